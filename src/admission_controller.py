@@ -0,0 +1,170 @@
+# Questo file contiene il controllo di ammissione per i punti di ingresso del checkout.
+# Le richieste vengono ammesse in base a token bucket globali e per cliente; quando
+# i token sono esauriti attendono in una coda limitata, ordinata per priorità,
+# fino a una scadenza, oltre la quale vengono rifiutate.
+
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+# Corsie di priorità: valori più bassi vengono serviti per primi
+PRIORITY_REFUND = 0
+PRIORITY_ORDER = 1
+
+
+class TokenBucket:
+    """Token bucket con `rate` token al secondo e al massimo `capacity` token accumulati."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError("Il tasso del token bucket deve essere positivo.")
+        if capacity < 1:
+            raise ValueError("La capacità del token bucket deve essere almeno di un token.")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated_at = clock()
+
+    def try_acquire(self, tokens=1):
+        """Consuma `tokens` token se disponibili e restituisce True, altrimenti False."""
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    def refund(self, tokens=1):
+        """Restituisce `tokens` token consumati da una richiesta poi rifiutata, senza superare la capacità."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + tokens)
+
+    def time_until_available(self, tokens=1):
+        """Secondi da attendere perché siano disponibili `tokens` token."""
+        self._refill()
+        return max(0.0, (tokens - self._tokens) / self.rate)
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+
+class AdmissionController:
+    """
+    Decide se ammettere una richiesta.
+
+    Il limite per cliente viene controllato subito e, se superato, la richiesta è
+    rifiutata senza attesa; se la richiesta viene poi rifiutata dal limite globale,
+    il token del cliente le viene restituito. Il limite globale, invece, può essere atteso: la
+    richiesta entra in una coda di al massimo `max_queue` elementi, servita per
+    priorità (e in ordine di arrivo a parità di priorità), e viene rifiutata se
+    non ottiene un token entro `max_wait` secondi. Con la coda piena, una richiesta
+    prende il posto dell'ultima in attesa con priorità inferiore, che viene rifiutata.
+
+    Senza burst esplicito, la capacità dei bucket è `max(1, rate)`: anche un tasso
+    inferiore a uno al secondo (es. un ordine ogni 10 secondi) ammette una richiesta.
+    """
+
+    def __init__(self, global_rate, global_burst=None, per_customer_rate=None, per_customer_burst=None,
+                 max_queue=100, max_wait=0.5, max_tracked_customers=100_000, clock=time.monotonic):
+        if max_queue < 0 or max_wait < 0:
+            raise ValueError("Dimensione della coda e attesa massima non possono essere negative.")
+
+        self._clock = clock
+        self._global_bucket = TokenBucket(global_rate, global_burst or max(1, global_rate), clock)
+        self.per_customer_rate = per_customer_rate
+        self.per_customer_burst = per_customer_burst or (per_customer_rate and max(1, per_customer_rate))
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.max_tracked_customers = max_tracked_customers
+
+        self._customer_buckets = OrderedDict()
+        self._waiting = []
+        # Biglietti scavalcati da richieste più prioritarie con la coda piena
+        self._evicted = set()
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def admit(self, priority=PRIORITY_ORDER, customer_id=None, max_wait=None):
+        """
+        Attende (al massimo `max_wait` secondi) di poter ammettere una richiesta.
+
+        Returns:
+            bool: True se la richiesta è ammessa, False se deve essere rifiutata.
+        """
+        deadline = self._clock() + (self.max_wait if max_wait is None else max_wait)
+        with self._condition:
+            customer_bucket = self._customer_bucket(customer_id)
+            if customer_bucket and not customer_bucket.try_acquire():
+                return False
+            if not self._waiting and self._global_bucket.try_acquire():
+                return True
+            if len(self._waiting) >= self.max_queue:
+                lowest = max(self._waiting) if self._waiting else None
+                if lowest is None or lowest[0] <= priority:
+                    self._refund(customer_bucket)
+                    return False
+                self._evict(lowest)
+
+            ticket = (priority, next(self._sequence))
+
+            heapq.heappush(self._waiting, ticket)
+            while True:
+                if ticket in self._evicted:
+                    self._evicted.discard(ticket)
+                    self._refund(customer_bucket)
+                    return False
+
+                is_head = self._waiting[0] == ticket
+                if is_head and self._global_bucket.try_acquire():
+                    heapq.heappop(self._waiting)
+                    self._condition.notify_all()
+                    return True
+
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._condition.notify_all()
+                    self._refund(customer_bucket)
+                    return False
+
+                if is_head:
+                    remaining = min(remaining, self._global_bucket.time_until_available())
+                self._condition.wait(timeout=remaining)
+
+    def queue_length(self):
+        """Restituisce il numero di richieste in attesa."""
+        with self._condition:
+            return len(self._waiting)
+
+    def _evict(self, ticket):
+        """Toglie dalla coda un biglietto in attesa, che verrà rifiutato al suo risveglio."""
+        self._waiting.remove(ticket)
+        heapq.heapify(self._waiting)
+        self._evicted.add(ticket)
+        self._condition.notify_all()
+
+    def _customer_bucket(self, customer_id):
+        """Restituisce il bucket del cliente, creandolo se serve; None se non c'è un limite per cliente."""
+        if customer_id is None or not self.per_customer_rate:
+            return None
+
+        bucket = self._customer_buckets.get(customer_id)
+        if bucket is None:
+            bucket = TokenBucket(self.per_customer_rate, self.per_customer_burst, self._clock)
+            self._customer_buckets[customer_id] = bucket
+            if len(self._customer_buckets) > self.max_tracked_customers:
+                self._customer_buckets.popitem(last=False)
+        else:
+            self._customer_buckets.move_to_end(customer_id)
+        return bucket
+
+    @staticmethod
+    def _refund(customer_bucket):
+        """Restituisce al cliente il token di una richiesta rifiutata dal limite globale."""
+        if customer_bucket:
+            customer_bucket.refund()
@@ -0,0 +1,214 @@
+# Questo file contiene l'aggregatore in-process delle vendite.
+# Invece di inviare un evento all'AnalyticsTracker per ogni ordine,
+# le vendite vengono accumulate localmente e spedite a lotti pre-aggregati.
+
+import heapq
+import itertools
+import threading
+import time
+from array import array
+
+
+class _RankingIndex:
+    """
+    Classifica dei totali per chiave, mantenuta come heap aggiornato a ogni incremento.
+
+    Ogni incremento aggiunge una voce allo heap (O(log n)); le voci superate da un
+    incremento successivo vengono scartate in lettura. Le prime `k` posizioni si
+    leggono quindi in O(k log n), senza scorrere tutte le chiavi.
+    """
+
+    def __init__(self):
+        self.totals = {}
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def add(self, key, delta):
+        total = self.totals.get(key, 0) + delta
+        self.totals[key] = total
+        heapq.heappush(self._heap, (-total, next(self._sequence), key))
+        # Compatta lo heap quando le voci superate diventano la maggioranza
+        if len(self._heap) > 2 * len(self.totals) + 16:
+            self._heap = [(-total, next(self._sequence), key) for key, total in self.totals.items()]
+            heapq.heapify(self._heap)
+
+    def top(self, n):
+        result = []
+        current = []
+        ranked = set()
+        while self._heap and len(result) < n:
+            entry = heapq.heappop(self._heap)
+            negative_total, _, key = entry
+            if self.totals.get(key) != -negative_total or key in ranked:
+                continue
+            ranked.add(key)
+            current.append(entry)
+            result.append((key, -negative_total))
+        # Le voci ancora valide tornano nello heap; quelle superate vengono scartate
+        for entry in current:
+            heapq.heappush(self._heap, entry)
+        return result
+
+
+class SalesAggregator:
+    """
+    Mantiene contatori di ricavi e unità vendute per prodotto e per minuto,
+    e invia periodicamente all'AnalyticsTracker dei lotti pre-aggregati.
+
+    I contatori per minuto sono memorizzati in due buffer circolari (array di float)
+    di `window_minutes` celle: ogni cella corrisponde a un minuto e viene azzerata
+    quando il buffer "gira" su un minuto nuovo.
+
+    Il lotto in sospeso viene inviato da `record_sale` quando è trascorso
+    `flush_interval` e, dopo `start()`, anche da un thread in background, così le
+    vendite vengono spedite anche quando il traffico si ferma.
+    """
+
+    def __init__(self, analytics_tracker, audit_logger=None, window_minutes=60, flush_interval=60.0,
+                 clock=time.time):
+        if not analytics_tracker:
+            raise ValueError("Il servizio di analytics deve essere fornito.")
+        if not isinstance(window_minutes, int) or window_minutes <= 0:
+            raise ValueError("La finestra deve essere un intero positivo di minuti.")
+        if flush_interval <= 0:
+            raise ValueError("L'intervallo di invio deve essere positivo.")
+
+        self.analytics_tracker = analytics_tracker
+        self.audit_logger = audit_logger
+        self.window_minutes = window_minutes
+        self.flush_interval = flush_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._worker = None
+
+        # Classifiche cumulative per prodotto
+        self._revenue_ranking = _RankingIndex()
+        self._units_ranking = _RankingIndex()
+
+        # Buffer circolari per minuto
+        self._minute_revenue = array("d", [0.0] * window_minutes)
+        self._minute_units = array("d", [0.0] * window_minutes)
+        self._minute_ids = array("q", [-1] * window_minutes)
+
+        # Vendite non ancora inviate, aggregate per prodotto: {product_id: [quantità, importo]}
+        self._pending = {}
+        self._last_flush = clock()
+
+    def record_sale(self, product_id, quantity, amount):
+        """
+        Registra una vendita e, se è trascorso l'intervallo, invia il lotto in sospeso.
+        Un errore dell'invio viene registrato e il lotto resta in attesa del prossimo tentativo.
+        """
+        with self._lock:
+            now = self._clock()
+            slot = self._slot_for(int(now // 60))
+            self._minute_revenue[slot] += amount
+            self._minute_units[slot] += quantity
+
+            self._revenue_ranking.add(product_id, amount)
+            self._units_ranking.add(product_id, quantity)
+
+            pending = self._pending.setdefault(product_id, [0, 0])
+            pending[0] += quantity
+            pending[1] += amount
+            flush_due = now - self._last_flush >= self.flush_interval
+
+        if flush_due:
+            self._flush_and_log()
+
+    def flush(self):
+        """
+        Invia all'AnalyticsTracker tutte le vendite in sospeso in un unico lotto.
+        Se l'invio fallisce le vendite restano in sospeso e l'eccezione viene propagata.
+        """
+        with self._lock:
+            self._last_flush = self._clock()
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return []
+
+        batch = [
+            {"product_id": product_id, "quantity": quantity, "amount": round(amount, 2)}
+            for product_id, (quantity, amount) in pending.items()
+        ]
+        try:
+            self.analytics_tracker.track_sales_batch(batch)
+        except Exception:
+            with self._lock:
+                for product_id, (quantity, amount) in self._pending.items():
+                    merged = pending.setdefault(product_id, [0, 0])
+                    merged[0] += quantity
+                    merged[1] += amount
+                self._pending = pending
+            raise
+        return batch
+
+    def start(self):
+        """Avvia l'invio periodico in background, se non è già attivo."""
+        if self._worker and self._worker.is_alive():
+            return
+        self._stop_event.clear()
+        self._worker = threading.Thread(target=self._run, name="sales-aggregator-flush", daemon=True)
+        self._worker.start()
+
+    def stop(self, timeout=None):
+        """Ferma l'invio periodico dopo aver spedito le vendite ancora in sospeso."""
+        if not self._worker:
+            return
+        self._stop_event.set()
+        self._worker.join(timeout)
+        self._worker = None
+
+    def top_sellers(self, n=10):
+        """Restituisce gli `n` prodotti con più unità vendute, come lista di (product_id, unità)."""
+        with self._lock:
+            return self._units_ranking.top(n)
+
+    def top_revenue(self, n=10):
+        """Restituisce gli `n` prodotti con il ricavo più alto, come lista di (product_id, ricavo)."""
+        with self._lock:
+            return self._revenue_ranking.top(n)
+
+    def current_minute(self):
+        """Finestra a cascata (tumbling): ricavi e unità del minuto corrente."""
+        return self.last_minutes(1)
+
+    def last_minutes(self, minutes):
+        """Finestra scorrevole (sliding): ricavi e unità degli ultimi `minutes` minuti."""
+        if not (0 < minutes <= self.window_minutes):
+            raise ValueError(f"La finestra deve essere tra 1 e {self.window_minutes} minuti.")
+
+        current = int(self._clock() // 60)
+        revenue = 0.0
+        units = 0
+        with self._lock:
+            for minute_id in range(current - minutes + 1, current + 1):
+                slot = minute_id % self.window_minutes
+                if self._minute_ids[slot] == minute_id:
+                    revenue += self._minute_revenue[slot]
+                    units += int(self._minute_units[slot])
+        return {"revenue": round(revenue, 2), "units": units}
+
+    def _run(self):
+        """Ciclo di invio periodico; all'arresto spedisce le vendite rimaste."""
+        while not self._stop_event.wait(self.flush_interval):
+            self._flush_and_log()
+        self._flush_and_log()
+
+    def _flush_and_log(self):
+        """Invia il lotto in sospeso registrando, invece di propagare, un eventuale errore."""
+        try:
+            self.flush()
+        except Exception as e:
+            if self.audit_logger:
+                self.audit_logger.log_event("ANALYTICS_FLUSH_FAILED", {"error": str(e)})
+
+    def _slot_for(self, minute_id):
+        """Restituisce la cella del buffer per il minuto dato, azzerandola se era di un minuto vecchio."""
+        slot = minute_id % self.window_minutes
+        if self._minute_ids[slot] != minute_id:
+            self._minute_ids[slot] = minute_id
+            self._minute_revenue[slot] = 0.0
+            self._minute_units[slot] = 0.0
+        return slot
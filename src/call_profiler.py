@@ -0,0 +1,207 @@
+# Questo file contiene la modalità di profilazione opzionale per OnlineStoreManager.
+# Una frazione delle chiamate ai metodi pubblici viene campionata con tracemalloc
+# (memoria allocata) e cProfile (tempo CPU per funzione); le statistiche vengono
+# scritte periodicamente in file JSON a rotazione, confrontabili tra loro.
+
+import cProfile
+import functools
+import inspect
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+
+from src.method_wrapping import wrap_methods, unwrap_methods
+
+DUMP_PREFIX = "profile-"
+
+
+def public_methods(store_manager):
+    """Restituisce i nomi dei metodi pubblici di istanza del gestore."""
+    cls = type(store_manager)
+    return [
+        name for name, _ in inspect.getmembers(cls, inspect.isfunction)
+        if not name.startswith("_") and not isinstance(inspect.getattr_static(cls, name), staticmethod)
+    ]
+
+
+class CallProfiler:
+    """
+    Profila un campione delle chiamate ai metodi pubblici di un OnlineStoreManager.
+
+    Per ogni chiamata campionata vengono misurati il tempo, la memoria netta allocata
+    e il picco di memoria (tracemalloc), e il profilo CPU viene accumulato in un
+    `cProfile.Profile` per metodo. Viene profilata una chiamata alla volta: le chiamate
+    concorrenti a una già in profilazione non vengono campionate.
+
+    tracemalloc viene avviato solo per la durata di una chiamata campionata, così le
+    chiamate non campionate non pagano il tracciamento delle allocazioni. Le misure di
+    memoria sono però dell'intero processo: includono le allocazioni fatte da altri
+    thread durante la chiamata campionata.
+
+    Ogni `dump_every` campioni (o con `dump()`) le statistiche vengono scritte in
+    `output_dir` e azzerate; restano solo gli ultimi `max_dumps` file.
+    """
+
+    def __init__(self, output_dir, sample_rate=0.01, dump_every=1000, max_dumps=10, top_functions=20,
+                 rng=random.random):
+        if not (0 < sample_rate <= 1):
+            raise ValueError("Il tasso di campionamento deve essere tra 0 e 1.")
+        if not isinstance(max_dumps, int) or max_dumps <= 0:
+            raise ValueError("Il numero di file da conservare deve essere un intero positivo.")
+
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.dump_every = dump_every
+        self.max_dumps = max_dumps
+        self.top_functions = top_functions
+        self._rng = rng
+        self._sampling_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._store_manager = None
+        self._methods = ()
+        self._layers = {}
+        self._dump_sequence = 0
+        self._reset()
+
+    def attach(self, store_manager, methods=None):
+        """Inizia a profilare i metodi pubblici (o quelli indicati) del gestore."""
+        if self._store_manager is not None:
+            raise RuntimeError("Il profiler è già collegato a un gestore.")
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._store_manager = store_manager
+        self._methods = tuple(methods or public_methods(store_manager))
+        self._layers = wrap_methods(store_manager, self._methods, self._wrap)
+
+    def detach(self):
+        """Smette di profilare e ripristina i metodi del gestore."""
+        if self._store_manager is None:
+            return
+        unwrap_methods(self._store_manager, self._layers)
+        self._store_manager = None
+        self._layers = {}
+
+    def dump(self):
+        """Scrive le statistiche accumulate in un nuovo file, le azzera e restituisce il percorso del file."""
+        with self._stats_lock:
+            methods, profiles = self._methods_stats, self._profiles
+            self._reset()
+
+        report = {"created_at": time.time(), "methods": {}}
+        for name, stats in methods.items():
+            samples = stats["samples"]
+            report["methods"][name] = {
+                "samples": samples,
+                "wall_time_mean": stats["wall_time"] / samples,
+                "alloc_net_bytes_mean": stats["alloc_net_bytes"] / samples,
+                "alloc_peak_bytes_mean": stats["alloc_peak_bytes"] / samples,
+                "top_functions": self._top_functions(profiles[name]),
+            }
+
+        self._dump_sequence += 1
+        path = os.path.join(self.output_dir,
+                            f"{DUMP_PREFIX}{time.strftime('%Y%m%d-%H%M%S')}-{self._dump_sequence:06d}.json")
+        with open(path, "w", encoding="utf-8") as dump_file:
+            json.dump(report, dump_file, indent=2)
+        self._rotate()
+        return path
+
+    def _reset(self):
+        self._methods_stats = {}
+        self._profiles = {}
+        self._samples_since_dump = 0
+
+    def _wrap(self, name, method):
+        @functools.wraps(method)
+        def profiled(*args, **kwargs):
+            if self._rng() >= self.sample_rate or not self._sampling_lock.acquire(blocking=False):
+                return method(*args, **kwargs)
+            try:
+                return self._profile_call(name, method, args, kwargs)
+            finally:
+                self._sampling_lock.release()
+
+        return profiled
+
+    def _profile_call(self, name, method, args, kwargs):
+        """Esegue una chiamata campionata; tracemalloc resta attivo solo durante la chiamata."""
+        started_tracemalloc = not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start()
+        profile = cProfile.Profile()
+        tracemalloc.reset_peak()
+        memory_before, _ = tracemalloc.get_traced_memory()
+        started_at = time.perf_counter()
+        profile.enable()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            profile.disable()
+            wall_time = time.perf_counter() - started_at
+            memory_after, memory_peak = tracemalloc.get_traced_memory()
+            if started_tracemalloc:
+                tracemalloc.stop()
+            self._record(name, profile, wall_time, memory_after - memory_before, memory_peak - memory_before)
+
+    def _record(self, name, profile, wall_time, alloc_net_bytes, alloc_peak_bytes):
+        with self._stats_lock:
+            stats = self._methods_stats.setdefault(
+                name, {"samples": 0, "wall_time": 0.0, "alloc_net_bytes": 0, "alloc_peak_bytes": 0})
+            stats["samples"] += 1
+            stats["wall_time"] += wall_time
+            stats["alloc_net_bytes"] += alloc_net_bytes
+            stats["alloc_peak_bytes"] += alloc_peak_bytes
+
+            profile.create_stats()
+            if name in self._profiles:
+                self._profiles[name].add(profile)
+            else:
+                self._profiles[name] = pstats.Stats(profile)
+            self._samples_since_dump += 1
+            should_dump = self.dump_every and self._samples_since_dump >= self.dump_every
+        if should_dump:
+            self.dump()
+
+    def _top_functions(self, stats):
+        """Le funzioni con il maggior tempo cumulativo, in forma serializzabile."""
+        rows = []
+        for (filename, line, function), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+            rows.append({"function": f"{os.path.basename(filename)}:{line}({function})", "ncalls": ncalls,
+                         "tottime": tottime, "cumtime": cumtime})
+        rows.sort(key=lambda row: row["cumtime"], reverse=True)
+        return rows[:self.top_functions]
+
+    def _rotate(self):
+        """Elimina i file di profilo più vecchi oltre `max_dumps`."""
+        dumps = sorted(name for name in os.listdir(self.output_dir)
+                       if name.startswith(DUMP_PREFIX) and name.endswith(".json"))
+        for name in dumps[:-self.max_dumps]:
+            os.remove(os.path.join(self.output_dir, name))
+
+
+def diff_dumps(old_path, new_path):
+    """
+    Confronta due file di profilo e restituisce, per ogni metodo presente in entrambi,
+    i valori medi vecchi e nuovi e la variazione relativa.
+    """
+    with open(old_path, encoding="utf-8") as old_file, open(new_path, encoding="utf-8") as new_file:
+        old_methods = json.load(old_file)["methods"]
+        new_methods = json.load(new_file)["methods"]
+
+    diff = {}
+    for name in sorted(old_methods.keys() & new_methods.keys()):
+        diff[name] = {}
+        for metric in ("wall_time_mean", "alloc_net_bytes_mean", "alloc_peak_bytes_mean"):
+            old, new = old_methods[name][metric], new_methods[name][metric]
+            diff[name][metric] = {"old": old, "new": new,
+                                  "change": (new - old) / old if old else None}
+    return diff
+
+
+def find_regressions(diff, metric="alloc_peak_bytes_mean", threshold=0.1):
+    """Restituisce i metodi in cui `metric` è peggiorata più di `threshold` (es. 0.1 = +10%)."""
+    return [name for name, metrics in diff.items()
+            if metrics[metric]["change"] is not None and metrics[metric]["change"] > threshold]
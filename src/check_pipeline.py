@@ -0,0 +1,125 @@
+# Questo file contiene la pipeline dei controlli preliminari di un ordine.
+# Ogni controllo dichiara un costo e le sue dipendenze: la pipeline esegue per
+# primi i controlli più economici e più selettivi e si ferma al primo fallimento.
+
+import threading
+
+
+class CheckStage:
+    """
+    Un controllo della pipeline.
+
+    Args:
+        name (str): Nome univoco del controllo.
+        check (callable): Funzione che riceve gli argomenti di `CheckPipeline.run` e restituisce
+            None se il controllo è superato, altrimenti il risultato di errore da restituire.
+        cost (float): Costo stimato del controllo (es. latenza relativa).
+        depends_on (tuple): Nomi dei controlli che devono essere eseguiti prima di questo.
+    """
+
+    def __init__(self, name, check, cost=1.0, depends_on=()):
+        if cost <= 0:
+            raise ValueError("Il costo di un controllo deve essere positivo.")
+        self.name = name
+        self.check = check
+        self.cost = cost
+        self.depends_on = tuple(depends_on)
+        self.runs = 0
+        self.rejections = 0
+        self._rejection_rate = 0.5
+
+    def rejection_rate(self):
+        """Stima della probabilità di rifiuto, con un valore neutro (0.5) in assenza di dati."""
+        return self._rejection_rate
+
+    def record(self, rejected, decay):
+        """
+        Registra l'esito di un'esecuzione. La stima è una media mobile esponenziale con
+        peso `decay`: nelle prime esecuzioni coincide con la media con smoothing di Laplace,
+        poi le osservazioni più vecchie perdono peso e la stima segue i cambiamenti del traffico.
+        """
+        self.runs += 1
+        if rejected:
+            self.rejections += 1
+        weight = max(decay, 1 / (self.runs + 2))
+        self._rejection_rate += weight * ((1.0 if rejected else 0.0) - self._rejection_rate)
+
+
+class CheckPipeline:
+    """
+    Esegue i controlli in ordine di costo atteso per rifiuto (`cost / rejection_rate`),
+    rispettando le dipendenze, e si ferma al primo controllo fallito.
+
+    Il tasso di rifiuto decade con peso `decay` per esecuzione e non scende sotto
+    `min_rejection_rate`: un controllo economico che non rifiuta mai non finisce
+    dietro uno costoso che rifiuta raramente.
+
+    Con `adaptive=False` l'ordine dipende solo dal costo dichiarato; a parità di
+    punteggio vale l'ordine in cui i controlli sono stati dichiarati.
+    """
+
+    def __init__(self, stages, adaptive=True, decay=0.01, min_rejection_rate=0.01):
+        if not (0 < decay <= 1):
+            raise ValueError("Il peso di decadimento deve essere tra 0 e 1.")
+        names = [stage.name for stage in stages]
+        if len(set(names)) != len(names):
+            raise ValueError("I nomi dei controlli devono essere univoci.")
+        for stage in stages:
+            missing = [name for name in stage.depends_on if name not in names]
+            if missing:
+                raise ValueError(f"Il controllo '{stage.name}' dipende da controlli inesistenti: {missing}")
+
+        self.stages = list(stages)
+        self.adaptive = adaptive
+        self.decay = decay
+        self.min_rejection_rate = min_rejection_rate
+        self._lock = threading.Lock()
+        # Verifica subito che le dipendenze non siano cicliche
+        self.execution_order()
+
+    def execution_order(self):
+        """Restituisce i nomi dei controlli nell'ordine in cui verrebbero eseguiti ora."""
+        return [stage.name for stage in self._ordered_stages()]
+
+    def run(self, *args):
+        """
+        Esegue i controlli fino al primo fallimento.
+
+        Returns:
+            Il risultato di errore del primo controllo fallito, oppure None se tutti sono superati.
+        """
+        for stage in self._ordered_stages():
+            result = stage.check(*args)
+            with self._lock:
+                stage.record(result is not None, self.decay)
+            if result is not None:
+                return result
+        return None
+
+    def stats(self):
+        """Restituisce, per ogni controllo, esecuzioni, rifiuti e tasso di rifiuto stimato."""
+        return {
+            stage.name: {"runs": stage.runs, "rejections": stage.rejections,
+                         "rejection_rate": round(stage.rejection_rate(), 4)}
+            for stage in self.stages
+        }
+
+    def _score(self, stage):
+        if not self.adaptive:
+            return stage.cost
+        return stage.cost / max(self.min_rejection_rate, stage.rejection_rate())
+
+    def _ordered_stages(self):
+        """Ordinamento topologico che sceglie sempre, tra i controlli pronti, quello col punteggio minore."""
+        done = set()
+        remaining = list(self.stages)
+        ordered = []
+        while remaining:
+            ready = [stage for stage in remaining if all(name in done for name in stage.depends_on)]
+            if not ready:
+                raise ValueError("Le dipendenze tra i controlli sono cicliche.")
+            best = min(ready, key=self._score)
+            ordered.append(best)
+            done.add(best.name)
+            remaining.remove(best)
+        return ordered
@@ -0,0 +1,159 @@
+# Questo file contiene il livello di batching per gli aggiornamenti post-ordine
+# del cliente: cronologia CRM e punti fedeltà vengono accumulati e scritti a lotti.
+
+import threading
+import time
+from collections import deque
+
+
+class CustomerUpdateBatcher:
+    """
+    Accumula gli aggiornamenti CRM e i punti fedeltà degli ordini completati e li
+    scrive a lotti, quando il lotto raggiunge `max_batch_size` voci o quando è
+    trascorso `flush_interval` dall'ultimo invio (anche senza nuovi ordini, dopo `start()`).
+
+    I punti fedeltà vengono calcolati per singolo ordine, come in `award_points`
+    (1 punto per ogni euro intero speso), e poi sommati per `customer_id`: il lotto
+    assegna quindi gli stessi punti delle chiamate per ordine. Ogni transazione viene
+    accettata una sola volta: i duplicati (es. retry dello stesso ordine) vengono
+    ignorati, e gli ID transazione vengono inviati insieme ai lotti così che anche il
+    servizio remoto possa scartare un lotto ripetuto dopo un errore di rete.
+    """
+
+    def __init__(self, crm_system, loyalty_manager, audit_logger=None, max_batch_size=100, flush_interval=5.0,
+                 dedup_window=100_000, clock=time.time):
+        if not crm_system or not loyalty_manager:
+            raise ValueError("CRM e gestore fedeltà devono essere forniti.")
+        if not isinstance(max_batch_size, int) or max_batch_size <= 0:
+            raise ValueError("La dimensione del lotto deve essere un intero positivo.")
+        if flush_interval <= 0:
+            raise ValueError("L'intervallo di invio deve essere positivo.")
+
+        self.crm_system = crm_system
+        self.loyalty_manager = loyalty_manager
+        self.audit_logger = audit_logger
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._worker = None
+
+        # Voci CRM in attesa, nell'ordine di arrivo
+        self._pending_history = []
+        # Punti in attesa per cliente: {customer_id: {"points": int, "transaction_ids": [...]}}
+        self._pending_points = {}
+
+        # Transazioni già accettate, limitate alle ultime `dedup_window`
+        self._seen_transactions = set()
+        self._seen_order = deque()
+        self._dedup_window = dedup_window
+
+        self._last_flush = clock()
+
+    def add(self, customer_id, transaction_id, amount):
+        """
+        Accoda gli aggiornamenti per un ordine completato. Se l'ordine completa un lotto,
+        il lotto viene scritto subito; un errore di scrittura viene registrato e il lotto
+        resta in coda, senza far fallire l'ordine.
+
+        Returns:
+            bool: False se la transazione era già stata accettata, True altrimenti.
+        """
+        with self._lock:
+            if transaction_id in self._seen_transactions:
+                return False
+            self._remember(transaction_id)
+
+            self._pending_history.append(
+                {"customer_id": customer_id, "transaction_id": transaction_id, "amount": amount})
+
+            points = self._pending_points.setdefault(customer_id, {"points": 0, "transaction_ids": []})
+            points["points"] += int(amount)
+            points["transaction_ids"].append(transaction_id)
+
+            flush_due = (len(self._pending_history) >= self.max_batch_size
+                         or self._clock() - self._last_flush >= self.flush_interval)
+
+        if flush_due:
+            self._flush_and_log()
+        return True
+
+    def flush(self):
+        """
+        Scrive i lotti in attesa su CRM e programma fedeltà.
+
+        I due lotti vengono svuotati separatamente e solo dopo una scrittura andata a
+        buon fine: se il secondo servizio fallisce, un nuovo `flush` ritenta solo quello.
+        L'errore viene propagato al chiamante.
+        """
+        with self._lock:
+            self._last_flush = self._clock()
+            history, self._pending_history = self._pending_history, []
+        if history:
+            try:
+                self.crm_system.bulk_update_customer_history(history)
+            except Exception:
+                with self._lock:
+                    self._pending_history = history + self._pending_history
+                raise
+
+        with self._lock:
+            points, self._pending_points = self._pending_points, {}
+        if points:
+            awards = [
+                {"customer_id": customer_id, "points": entry["points"], "transaction_ids": entry["transaction_ids"]}
+                for customer_id, entry in points.items()
+            ]
+            try:
+                self.loyalty_manager.award_points_batch(awards)
+            except Exception:
+                with self._lock:
+                    for customer_id, entry in self._pending_points.items():
+                        merged = points.setdefault(customer_id, {"points": 0, "transaction_ids": []})
+                        merged["points"] += entry["points"]
+                        merged["transaction_ids"].extend(entry["transaction_ids"])
+                    self._pending_points = points
+                raise
+
+    def start(self):
+        """Avvia la scrittura periodica in background, se non è già attiva."""
+        if self._worker and self._worker.is_alive():
+            return
+        self._stop_event.clear()
+        self._worker = threading.Thread(target=self._run, name="customer-update-flush", daemon=True)
+        self._worker.start()
+
+    def stop(self, timeout=None):
+        """Ferma la scrittura periodica dopo aver scritto gli aggiornamenti ancora in coda."""
+        if not self._worker:
+            return
+        self._stop_event.set()
+        self._worker.join(timeout)
+        self._worker = None
+
+    def pending_count(self):
+        """Restituisce il numero di ordini non ancora scritti sul CRM."""
+        with self._lock:
+            return len(self._pending_history)
+
+    def _run(self):
+        """Ciclo di scrittura periodica; all'arresto scrive gli aggiornamenti rimasti."""
+        while not self._stop_event.wait(self.flush_interval):
+            self._flush_and_log()
+        self._flush_and_log()
+
+    def _flush_and_log(self):
+        """Scrive i lotti in attesa registrando, invece di propagare, un eventuale errore."""
+        try:
+            self.flush()
+        except Exception as e:
+            if self.audit_logger:
+                self.audit_logger.log_event("CUSTOMER_UPDATE_FLUSH_FAILED", {"error": str(e)})
+
+    def _remember(self, transaction_id):
+        """Registra una transazione come accettata, dimenticando la più vecchia oltre la finestra."""
+        self._seen_transactions.add(transaction_id)
+        self._seen_order.append(transaction_id)
+        if len(self._seen_order) > self._dedup_window:
+            self._seen_transactions.discard(self._seen_order.popleft())
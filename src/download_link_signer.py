@@ -0,0 +1,90 @@
+# Questo file contiene la generazione locale dei link di download per i prodotti digitali.
+# I link sono firmati con HMAC e hanno una scadenza, quindi possono essere
+# verificati senza interrogare il DigitalAssetManager né un database.
+
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode, urlsplit, parse_qs, quote, unquote
+
+
+class DownloadLinkSigner:
+    """
+    Genera e verifica link di download firmati e con scadenza.
+
+    Un link generato viene riutilizzato per la stessa coppia (prodotto, cliente)
+    finché gli resta almeno `refresh_margin` della sua validità: in questo modo
+    i download ripetuti non producono un nuovo link ogni volta.
+    """
+
+    def __init__(self, secret_key, base_url="https://my.store/download", ttl_seconds=3600,
+                 refresh_margin=0.1, max_cached_links=100_000, clock=time.time):
+        if not secret_key:
+            raise ValueError("La chiave segreta deve essere fornita.")
+        if ttl_seconds <= 0:
+            raise ValueError("La validità del link deve essere positiva.")
+
+        self._secret_key = secret_key.encode() if isinstance(secret_key, str) else secret_key
+        self.base_url = base_url.rstrip("/")
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin = refresh_margin
+        self.max_cached_links = max_cached_links
+        self._clock = clock
+        # Cache LRU: {(product_id, customer_id): (url, expires)}
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def generate_download_link(self, product_id, customer_id):
+        """Restituisce un link firmato per il prodotto, riusando quello in cache se ancora valido."""
+        now = int(self._clock())
+        key = (product_id, customer_id)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[1] - now > self.ttl_seconds * self.refresh_margin:
+                self._cache.move_to_end(key)
+                return cached[0]
+
+        expires = now + int(self.ttl_seconds)
+        query = urlencode({"customer": customer_id, "expires": expires,
+                           "signature": self._sign(product_id, customer_id, expires)})
+        url = f"{self.base_url}/{quote(str(product_id), safe='')}?{query}"
+
+        with self._lock:
+            self._cache[key] = (url, expires)
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.max_cached_links:
+                self._cache.popitem(last=False)
+        return url
+
+    def validate(self, url):
+        """
+        Verifica un link firmato.
+
+        Returns:
+            dict: `{"status": "success", "product_id": ..., "customer_id": ...}` se il link è valido,
+            altrimenti `{"status": "error", "message": ...}`.
+        """
+        parts = urlsplit(url)
+        params = parse_qs(parts.query)
+        try:
+            product_id = unquote(parts.path.rsplit("/", 1)[1])
+            customer_id = params["customer"][0]
+            expires = int(params["expires"][0])
+            signature = params["signature"][0]
+        except (IndexError, KeyError, ValueError):
+            return {"status": "error", "message": "Link di download non valido."}
+
+        expected = self._sign(product_id, customer_id, expires)
+        # Il confronto avviene su bytes: una firma manomessa con caratteri non ASCII è solo non valida
+        if not hmac.compare_digest(signature.encode(), expected.encode()):
+            return {"status": "error", "message": "Link di download non valido."}
+        if expires < self._clock():
+            return {"status": "error", "message": "Link di download scaduto."}
+        return {"status": "success", "product_id": product_id, "customer_id": customer_id}
+
+    def _sign(self, product_id, customer_id, expires):
+        """Calcola la firma HMAC-SHA256 di prodotto, cliente e scadenza."""
+        message = f"{product_id}\n{customer_id}\n{expires}".encode()
+        return hmac.new(self._secret_key, message, hashlib.sha256).hexdigest()
@@ -2,12 +2,20 @@
 # Nella nostra suite di test, non useremo queste implementazioni,
 # ma le sostituiremo con dei mock.
 
+import random
+import uuid
+
+
 class ProductDatabase:
     """Simula l'interazione con un database di prodotti."""
     def get_product_details(self, product_id):
         print(f"DATABASE: Reperimento dettagli per {product_id}")
         pass
 
+    def get_products_details(self, product_ids):
+        print(f"DATABASE: Reperimento dettagli per {len(product_ids)} prodotti")
+        pass
+
     def check_product_availability(self, product_id, quantity):
         print(f"DATABASE: Controllo disponibilità di {quantity} pezzi per {product_id}")
         pass
@@ -47,6 +55,10 @@ class NotificationService:
         print(f"NOTIFICATION: Invio conferma a {customer_email} per ordine di {quantity}x {product_id}")
         pass
 
+    def send_bulk(self, messages):
+        print(f"NOTIFICATION: Invio di {len(messages)} messaggi")
+        pass
+
 
 class ShippingService:
     """Simula l'interazione con un sistema di logistica e spedizioni."""
@@ -54,6 +66,10 @@ class ShippingService:
         print(f"SHIPPING: Pianificazione spedizione di {quantity}x {product_id} a {address}")
         pass
 
+    def schedule_bulk_shipments(self, shipments):
+        print(f"SHIPPING: Pianificazione di {len(shipments)} spedizioni consolidate")
+        pass
+
 
 class AuditLogger:
     """Simula un servizio di logging per audit e tracciabilità."""
@@ -80,12 +96,22 @@ class LoyaltyProgramManager:
         print(f"LOYALTY: Assegnati {points} punti al cliente {customer_id}")
         pass
 
+    def award_points_batch(self, awards):
+        for award in awards:
+            print(f"LOYALTY: Assegnati {award['points']} punti al cliente {award['customer_id']} "
+                  f"per le transazioni {award['transaction_ids']}")
+        pass
+
 class AnalyticsTracker:
     """Simula un servizio di analytics per il tracciamento delle vendite."""
     def track_sale(self, product_id, quantity, amount):
         print(f"ANALYTICS: Tracciata vendita per prodotto {product_id} - Importo: {amount}")
         pass
 
+    def track_sales_batch(self, aggregated_sales):
+        print(f"ANALYTICS: Tracciato lotto di {len(aggregated_sales)} vendite aggregate")
+        pass
+
 class CurrencyConverter:
     """Simula un servizio di conversione valuta."""
     def get_rate(self, from_currency, to_currency):
@@ -101,12 +127,20 @@ class CRMSystem:
         print(f"CRM: Aggiornamento cronologia cliente {customer_id} con transazione {transaction_id}")
         pass
 
+    def bulk_update_customer_history(self, entries):
+        print(f"CRM: Aggiornamento cronologia con {len(entries)} transazioni")
+        pass
+
 class GiftOptionsService:
     """Simula un servizio per calcolare i costi delle opzioni regalo."""
     def get_gift_wrap_price(self, option_details):
         print(f"GIFT: Calcolo costo per opzioni: {option_details}")
         return 5.00 # Costo fisso per confezione regalo
 
+    def get_gift_price_table(self):
+        print("GIFT: Reperimento catalogo prezzi opzioni regalo")
+        return [{"options": {"wrap": True}, "price": 5.00}]
+
 class DigitalAssetManager:
     """Simula la gestione di asset digitali e link per il download."""
     def generate_download_link(self, product_id, customer_id):
@@ -120,6 +154,18 @@ class RMAManager:
         print(f"RMA: Creato ticket {ticket_id} per la transazione {transaction_id}")
         return ticket_id
 
+    _next_ticket_number = 10000
+
+    def reserve_ticket_block(self, block_size):
+        start = RMAManager._next_ticket_number
+        RMAManager._next_ticket_number += block_size
+        print(f"RMA: Riservato blocco di {block_size} ticket a partire da {start}")
+        return start
+
+    def create_rma_tickets(self, tickets):
+        print(f"RMA: Creati {len(tickets)} ticket")
+        pass
+
 class ComplianceChecker:
     """Simula un servizio che controlla la conformità normativa per le spedizioni."""
     def verify_shipment(self, product_id, address):
@@ -0,0 +1,100 @@
+# Questo file contiene la tabella locale dei prezzi delle opzioni regalo.
+# Il catalogo delle opzioni è piccolo e fisso: viene caricato una volta dal
+# GiftOptionsService e aggiornato periodicamente in background.
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+def canonical_key(option_details):
+    """Restituisce un hash stabile di un dizionario di opzioni, indipendente dall'ordine delle chiavi."""
+    canonical = json.dumps(option_details, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class GiftPricingTable:
+    """
+    Tabella dei prezzi delle opzioni regalo, indicizzata per `canonical_key`.
+
+    Le combinazioni non presenti nel catalogo (es. con messaggi personalizzati) vengono
+    chieste al GiftOptionsService e memorizzate in una cache LRU separata dal catalogo,
+    limitata a `max_memoized` voci e svuotata a ogni aggiornamento della tabella.
+    """
+
+    def __init__(self, gift_options_service, audit_logger=None, refresh_interval=3600.0, max_memoized=10_000):
+        if not gift_options_service:
+            raise ValueError("Il servizio opzioni regalo deve essere fornito.")
+        if refresh_interval <= 0:
+            raise ValueError("L'intervallo di aggiornamento deve essere positivo.")
+
+        self.gift_options_service = gift_options_service
+        self.audit_logger = audit_logger
+        self.refresh_interval = refresh_interval
+        self.max_memoized = max_memoized
+        self._prices = {}
+        # Cache LRU dei prezzi fuori catalogo: {chiave canonica: prezzo}
+        self._memoized = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._worker = None
+
+    def refresh(self):
+        """Ricarica l'intero catalogo dei prezzi dal servizio remoto."""
+        catalog = self.gift_options_service.get_gift_price_table() or []
+        prices = {canonical_key(entry["options"]): entry["price"] for entry in catalog}
+        with self._lock:
+            self._prices = prices
+            self._memoized = OrderedDict()
+
+    def get_gift_wrap_price(self, option_details):
+        """Restituisce il prezzo di una combinazione di opzioni regalo."""
+        key = canonical_key(option_details)
+        price = self._prices.get(key)
+        if price is not None:
+            return price
+
+        with self._lock:
+            price = self._memoized.get(key)
+            if price is not None:
+                self._memoized.move_to_end(key)
+                return price
+
+        price = self.gift_options_service.get_gift_wrap_price(option_details)
+        with self._lock:
+            self._memoized[key] = price
+            self._memoized.move_to_end(key)
+            if len(self._memoized) > self.max_memoized:
+                self._memoized.popitem(last=False)
+        return price
+
+    def quote(self, options_list):
+        """Restituisce i prezzi di più combinazioni (es. un carrello), nello stesso ordine."""
+        return [self.get_gift_wrap_price(option_details) for option_details in options_list]
+
+    def start(self):
+        """Carica il catalogo e avvia l'aggiornamento periodico in background."""
+        self.refresh()
+        if self._worker and self._worker.is_alive():
+            return
+        self._stop_event.clear()
+        self._worker = threading.Thread(target=self._run, name="gift-pricing-refresh", daemon=True)
+        self._worker.start()
+
+    def stop(self, timeout=None):
+        """Ferma l'aggiornamento periodico."""
+        if not self._worker:
+            return
+        self._stop_event.set()
+        self._worker.join(timeout)
+        self._worker = None
+
+    def _run(self):
+        """Ciclo di aggiornamento: un errore viene registrato e resta in uso la tabella precedente."""
+        while not self._stop_event.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                if self.audit_logger:
+                    self.audit_logger.log_event("GIFT_PRICING_REFRESH_FAILED", {"error": str(e)})
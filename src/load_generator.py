@@ -0,0 +1,173 @@
+# Questo file contiene il generatore di carico che riproduce una traccia registrata
+# con TrafficRecorder contro un OnlineStoreManager collegato a servizi finti con
+# latenza configurabile, per misurare throughput e latenze al variare del carico.
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.online_store_manager import OnlineStoreManager
+
+DEPENDENCY_NAMES = (
+    "product_db", "inventory_sys", "payment_gw", "promo_validator", "notification_service",
+    "shipping_service", "audit_logger", "fraud_detector", "tax_calculator", "loyalty_manager",
+    "analytics_tracker", "currency_converter", "crm_system", "gift_options_service",
+    "digital_asset_manager", "rma_manager", "compliance_checker",
+)
+
+# Risposte di default dei servizi finti: un valore costante o una funzione degli argomenti
+DEFAULT_RESPONSES = {
+    "get_product_details": {"price": 10.0, "is_digital": True, "is_returnable": True},
+    "check_product_availability": True,
+    "process_payment": {"status": "success", "transaction_id": "T-LOAD"},
+    "process_refund": {"status": "success"},
+    "validate_code": {"is_valid": True, "discount_percentage": 10},
+    "is_fraudulent": False,
+    "verify_shipment": True,
+    "calculate_tax": lambda amount, address: amount * 0.22,
+    "get_rate": 1.08,
+    "get_gift_wrap_price": 5.0,
+    "generate_download_link": "https://my.store/download/fake",
+}
+
+
+class FakeService:
+    """
+    Servizio finto: ogni metodo attende `latency` secondi e restituisce la risposta
+    configurata in `responses` (None per i metodi non configurati).
+    """
+
+    def __init__(self, latency=0.0, responses=None):
+        self._latency = latency
+        self._responses = DEFAULT_RESPONSES if responses is None else responses
+
+    def __bool__(self):
+        return True
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        response = self._responses.get(name)
+
+        def call(*args, **kwargs):
+            if self._latency:
+                time.sleep(self._latency)
+            return response(*args, **kwargs) if callable(response) else response
+
+        return call
+
+
+def build_fake_store_manager(latency=0.0, responses=None):
+    """
+    Crea un OnlineStoreManager collegato a servizi finti.
+
+    Args:
+        latency (float | dict): Latenza di ogni chiamata, uguale per tutti i servizi o
+            per nome di dipendenza (es. `{"payment_gw": 0.05}`, default 0 per gli altri).
+        responses (dict, optional): Risposte dei servizi, al posto di DEFAULT_RESPONSES.
+    """
+    latencies = latency if isinstance(latency, dict) else dict.fromkeys(DEPENDENCY_NAMES, latency)
+    return OnlineStoreManager(*(FakeService(latencies.get(name, 0.0), responses) for name in DEPENDENCY_NAMES))
+
+
+def load_trace(source):
+    """Legge una traccia JSONL da un percorso o da un file aperto."""
+    if isinstance(source, str):
+        with open(source, encoding="utf-8") as trace_file:
+            return load_trace(trace_file)
+    return [json.loads(line) for line in source if line.strip()]
+
+
+def _percentile(sorted_values, percentile):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(percentile / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class LoadGenerator:
+    """
+    Riproduce una traccia contro un OnlineStoreManager.
+
+    La latenza di ogni chiamata è misurata dall'istante in cui la chiamata era
+    prevista, non da quando è partita: così anche il tempo passato in coda quando
+    il sistema è saturo rientra nella misura.
+    """
+
+    def __init__(self, store_manager, trace, workers=16):
+        if not trace:
+            raise ValueError("La traccia non contiene chiamate.")
+        self.store_manager = store_manager
+        self.trace = list(trace)
+        self.workers = workers
+
+    def replay(self, speed=1.0):
+        """Riproduce la traccia rispettando i tempi registrati, accelerati di `speed` volte."""
+        if speed <= 0:
+            raise ValueError("La velocità deve essere positiva.")
+        offset = self.trace[0]["ts"]
+        schedule = [((event["ts"] - offset) / speed, event) for event in self.trace]
+        return self._run(schedule)
+
+    def run_open_loop(self, qps, requests=None):
+        """
+        Invia le chiamate a ritmo costante (`qps` al secondo) indipendentemente dalle
+        risposte, ripetendo la traccia fino a `requests` chiamate (default: una volta).
+        """
+        if qps <= 0:
+            raise ValueError("Il carico deve essere positivo.")
+        requests = requests or len(self.trace)
+        schedule = [(i / qps, self.trace[i % len(self.trace)]) for i in range(requests)]
+        result = self._run(schedule)
+        result["offered_qps"] = qps
+        return result
+
+    def sweep(self, qps_levels, requests=None, saturation_ratio=0.9):
+        """
+        Esegue il carico a ritmo costante per ogni livello e restituisce la curva
+        latenza/carico e il throughput di saturazione, cioè il throughput massimo
+        ottenuto a un livello in cui il sistema ha tenuto almeno `saturation_ratio`
+        del carico offerto.
+        """
+        curve = [self.run_open_loop(qps, requests) for qps in sorted(qps_levels)]
+        sustained = [point["throughput"] for point in curve
+                     if point["throughput"] >= saturation_ratio * point["offered_qps"]]
+        return {"curve": curve, "saturation_throughput": max(sustained, default=0.0)}
+
+    def _run(self, schedule):
+        latencies = []
+        errors = 0
+        lock = threading.Lock()
+        started_at = time.monotonic()
+
+        def execute(due, event):
+            nonlocal errors
+            try:
+                result = getattr(self.store_manager, event["method"])(**event["args"])
+                failed = isinstance(result, dict) and result.get("status") == "error"
+            except Exception:
+                failed = True
+            latency = time.monotonic() - (started_at + due)
+            with lock:
+                latencies.append(latency)
+                errors += failed
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for due, event in schedule:
+                delay = started_at + due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(execute, due, event)
+
+        elapsed = time.monotonic() - started_at
+        latencies.sort()
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "elapsed": round(elapsed, 6),
+            "throughput": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            "latency_p50": _percentile(latencies, 50),
+            "latency_p95": _percentile(latencies, 95),
+            "latency_p99": _percentile(latencies, 99),
+        }
@@ -0,0 +1,74 @@
+# Questo file contiene l'avvolgimento dei metodi di istanza usato dagli strumenti
+# di osservazione (registratore del traffico, profiler): più strumenti possono
+# avvolgere gli stessi metodi dello stesso gestore e staccarsi in qualsiasi ordine.
+
+import functools
+
+_MISSING = object()
+
+
+class _Layer:
+    """Uno strato di avvolgimento di un metodo: cosa chiama e cosa c'era prima di lui."""
+
+    def __init__(self, inner, previous):
+        self.inner = inner
+        self.previous = previous
+        self.wrapper = None
+
+
+def _layer_of(attribute):
+    return getattr(attribute, "_wrapping_layer", None)
+
+
+def _delegate(layer):
+    """Restituisce una funzione che chiama sempre lo strato sottostante attuale di `layer`."""
+    @functools.wraps(layer.inner)
+    def call_inner(*args, **kwargs):
+        return layer.inner(*args, **kwargs)
+
+    return call_inner
+
+
+def wrap_methods(target, names, make_wrapper):
+    """
+    Sostituisce i metodi `names` di `target` con `make_wrapper(name, method)`.
+
+    Il wrapper riceve un `method` che delega allo strato sottostante, così uno strato
+    intermedio può essere rimosso senza toccare quelli sopra di lui.
+
+    Returns:
+        dict: {nome: strato}, da passare a `unwrap_methods`.
+    """
+    layers = {}
+    for name in names:
+        layer = _Layer(getattr(target, name), vars(target).get(name, _MISSING))
+        layer.wrapper = make_wrapper(name, _delegate(layer))
+        layer.wrapper._wrapping_layer = layer
+        setattr(target, name, layer.wrapper)
+        layers[name] = layer
+    return layers
+
+
+def unwrap_methods(target, layers):
+    """
+    Rimuove gli strati restituiti da `wrap_methods`.
+
+    Se uno strato è in cima viene ripristinato l'attributo precedente; se sopra di lui
+    c'è un altro strato, quest'ultimo viene ricollegato direttamente a ciò che stava sotto.
+    """
+    for name, layer in layers.items():
+        above = None
+        current = _layer_of(vars(target).get(name))
+        while current is not None and current is not layer:
+            above, current = current, _layer_of(current.previous)
+        if current is None:
+            # Il metodo è stato sostituito da altri nel frattempo: non c'è nulla da ripristinare
+            continue
+
+        if above is not None:
+            above.inner = layer.inner
+            above.previous = layer.previous
+        elif layer.previous is _MISSING:
+            delattr(target, name)
+        else:
+            setattr(target, name, layer.previous)
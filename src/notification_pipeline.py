@@ -0,0 +1,164 @@
+# Questo file contiene la pipeline asincrona per le notifiche di conferma ordine.
+# I messaggi vengono generati da template precompilati, deduplicati per transazione
+# e inviati al NotificationService a lotti da un thread separato.
+
+import queue
+import threading
+import time
+from collections import deque
+from string import Template
+
+DEFAULT_TEMPLATES = {
+    "order_confirmation": "Grazie per il tuo ordine! Transazione $transaction_id: $quantity x $product_id.",
+}
+
+
+class NotificationPipeline:
+    """
+    Pipeline di invio delle conferme d'ordine, eseguita fuori dal thread della richiesta.
+
+    `enqueue` si limita a mettere il messaggio in coda: il thread di invio raccoglie fino a
+    `max_batch_size` messaggi (o quelli arrivati entro `flush_interval` secondi) e li
+    spedisce con una sola chiamata a `NotificationService.send_bulk`.
+
+    Una transazione viene considerata notificata solo dopo un invio riuscito: finché
+    è in coda un duplicato viene ignorato, ma se la generazione del testo o l'invio
+    falliscono la transazione può essere accodata di nuovo.
+    """
+
+    _STOP = object()
+
+    def __init__(self, notification_service, audit_logger=None, templates=None, max_batch_size=50,
+                 flush_interval=2.0, dedup_window=100_000):
+        if not notification_service:
+            raise ValueError("Il servizio di notifica deve essere fornito.")
+        if not isinstance(max_batch_size, int) or max_batch_size <= 0:
+            raise ValueError("La dimensione del lotto deve essere un intero positivo.")
+
+        self.notification_service = notification_service
+        self.audit_logger = audit_logger
+        self.templates = dict(templates or DEFAULT_TEMPLATES)
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+
+        self._compiled_templates = {}
+        self._queue = queue.Queue()
+        self._worker = None
+
+        # Transazioni in coda o in invio
+        self._pending_transactions = set()
+        # Transazioni già notificate, limitate alle ultime `dedup_window`
+        self._seen_transactions = set()
+        self._seen_order = deque()
+        self._dedup_window = dedup_window
+        self._seen_lock = threading.Lock()
+
+    def render(self, template_name, **context):
+        """Genera il testo di un template, compilandolo solo al primo utilizzo."""
+        template = self._compiled_templates.get(template_name)
+        if template is None:
+            if template_name not in self.templates:
+                raise KeyError(f"Template '{template_name}' non trovato.")
+            template = Template(self.templates[template_name])
+            self._compiled_templates[template_name] = template
+        return template.substitute(context)
+
+    def enqueue(self, customer_email, product_id, quantity, transaction_id):
+        """
+        Accoda una conferma d'ordine.
+
+        Returns:
+            bool: False se per la transazione era già stata accodata una conferma, True altrimenti.
+        """
+        with self._seen_lock:
+            if transaction_id in self._seen_transactions or transaction_id in self._pending_transactions:
+                return False
+
+        body = self.render("order_confirmation", product_id=product_id, quantity=quantity,
+                           transaction_id=transaction_id)
+        with self._seen_lock:
+            if transaction_id in self._seen_transactions or transaction_id in self._pending_transactions:
+                return False
+            self._pending_transactions.add(transaction_id)
+        self._queue.put({"to": customer_email, "transaction_id": transaction_id, "body": body})
+        return True
+
+    def start(self):
+        """Avvia il thread di invio, se non è già attivo."""
+        if self._worker and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(target=self._run, name="notification-pipeline", daemon=True)
+        self._worker.start()
+
+    def stop(self, timeout=None):
+        """Ferma il thread di invio dopo aver spedito i messaggi ancora in coda."""
+        if not self._worker:
+            return
+        self._queue.put(self._STOP)
+        self._worker.join(timeout)
+        self._worker = None
+
+    def flush(self):
+        """Invia subito, dal thread chiamante, tutti i messaggi in coda."""
+        batch = []
+        while True:
+            try:
+                message = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if message is self._STOP:
+                # Il segnale di arresto va lasciato al thread di invio
+                self._queue.put(message)
+                break
+            batch.append(message)
+            if len(batch) >= self.max_batch_size:
+                self._send(batch)
+                batch = []
+        self._send(batch)
+
+    def _run(self):
+        """Ciclo del thread di invio: raccoglie un lotto e lo spedisce."""
+        while True:
+            message = self._queue.get()
+            if message is self._STOP:
+                return
+            batch = [message]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    message = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if message is self._STOP:
+                    self._send(batch)
+                    return
+                batch.append(message)
+            self._send(batch)
+
+    def _send(self, batch):
+        """
+        Spedisce un lotto; un errore viene registrato ma non interrompe la pipeline.
+        Le transazioni di un lotto non inviato tornano accodabili, così un nuovo tentativo non viene scartato.
+        """
+        if not batch:
+            return
+        transaction_ids = [message["transaction_id"] for message in batch]
+        try:
+            self.notification_service.send_bulk(batch)
+        except Exception as e:
+            with self._seen_lock:
+                self._pending_transactions.difference_update(transaction_ids)
+            if self.audit_logger:
+                self.audit_logger.log_event("NOTIFICATION_FAILED", {"count": len(batch), "error": str(e)})
+            return
+
+        with self._seen_lock:
+            for transaction_id in transaction_ids:
+                self._pending_transactions.discard(transaction_id)
+                self._seen_transactions.add(transaction_id)
+                self._seen_order.append(transaction_id)
+            while len(self._seen_order) > self._dedup_window:
+                self._seen_transactions.discard(self._seen_order.popleft())
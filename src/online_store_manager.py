@@ -5,6 +5,16 @@ from src.external_dependencies import (
     CurrencyConverter, CRMSystem, GiftOptionsService,
     DigitalAssetManager, RMAManager, ComplianceChecker
 )
+from src.analytics_aggregator import SalesAggregator
+from src.customer_update_batcher import CustomerUpdateBatcher
+from src.notification_pipeline import NotificationPipeline
+from src.shipment_consolidator import ShipmentConsolidator
+from src.download_link_signer import DownloadLinkSigner
+from src.rma_ticket_allocator import RMATicketAllocator
+from src.gift_pricing_table import GiftPricingTable
+from src.check_pipeline import CheckPipeline, CheckStage
+from src.admission_controller import AdmissionController, PRIORITY_ORDER, PRIORITY_REFUND
+from src.price_view import PriceView
 
 
 class OnlineStoreManager:
@@ -22,7 +32,17 @@ class OnlineStoreManager:
             loyalty_manager: LoyaltyProgramManager, analytics_tracker: AnalyticsTracker,
             currency_converter: CurrencyConverter, crm_system: CRMSystem,
             gift_options_service: GiftOptionsService, digital_asset_manager: DigitalAssetManager,
-            rma_manager: RMAManager, compliance_checker: ComplianceChecker
+            rma_manager: RMAManager, compliance_checker: ComplianceChecker,
+            sales_aggregator: SalesAggregator = None,
+            customer_update_batcher: CustomerUpdateBatcher = None,
+            notification_pipeline: NotificationPipeline = None,
+            shipment_consolidator: ShipmentConsolidator = None,
+            download_link_signer: DownloadLinkSigner = None,
+            rma_ticket_allocator: RMATicketAllocator = None,
+            gift_pricing_table: GiftPricingTable = None,
+            order_check_pipeline: CheckPipeline = None,
+            admission_controller: AdmissionController = None,
+            price_view: PriceView = None
     ):
         # Il controllo delle dipendenze diventa sempre più cruciale
         dependencies = [
@@ -52,6 +72,18 @@ class OnlineStoreManager:
         self.rma_manager = rma_manager
         self.compliance_checker = compliance_checker
 
+        # Componenti opzionali: se assenti, ogni operazione chiama direttamente i servizi esterni
+        self.sales_aggregator = sales_aggregator
+        self.customer_update_batcher = customer_update_batcher
+        self.notification_pipeline = notification_pipeline
+        self.shipment_consolidator = shipment_consolidator
+        self.download_link_signer = download_link_signer
+        self.rma_ticket_allocator = rma_ticket_allocator
+        self.gift_pricing_table = gift_pricing_table
+        self.order_check_pipeline = order_check_pipeline
+        self.admission_controller = admission_controller
+        self.price_view = price_view
+
     def get_product_info(self, product_id):
         """Recupera e restituisce le informazioni di un prodotto."""
         if not product_id:
@@ -78,6 +110,11 @@ class OnlineStoreManager:
         Returns:
             dict: Un dizionario con lo stato dell'ordine e un messaggio.
         """
+        # Controllo di ammissione: in caso di sovraccarico l'ordine viene rifiutato prima di ogni altro servizio
+        rejection = self._admit("process_order", PRIORITY_ORDER, (customer_info or {}).get("id"))
+        if rejection:
+            return rejection
+
         # Log iniziale per tracciabilità
         self.audit_logger.log_event("ORDER_PROCESS_STARTED", {"product_id": product_id, "quantity": quantity})
 
@@ -85,40 +122,23 @@ class OnlineStoreManager:
         if not isinstance(quantity, int) or quantity <= 0:
             return {"status": "error", "message": "La quantità deve essere un intero positivo."}
 
-        # 2. Recupero dettagli prodotto
-        product_details = self.product_db.get_product_details(product_id)
-        if not product_details:
-            self.audit_logger.log_event("ORDER_FAILED", {"reason": "Product not found"})
-            return {"status": "error", "message": "Prodotto non trovato."}
-
-        # 3. Controllo anti-frode
-        if self.fraud_detector.is_fraudulent(customer_info, card_details):
-            self.audit_logger.log_event("ORDER_FAILED",
-                                        {"reason": "Fraud detected", "customer_id": customer_info.get("id")})
-            return {"status": "error", "message": "L'ordine è stato bloccato per sospetta frode."}
-
-        # 4. Verifica conformità spedizione
-        if not self.compliance_checker.verify_shipment(product_id, customer_info["address"]):
-            self.audit_logger.log_event("ORDER_FAILED",
-                                        {"reason": "Compliance check failed", "address": customer_info["address"]})
-            return {"status": "error",
-                    "message": "Prodotto non spedibile a questo indirizzo per restrizioni normative."}
-
-        # 5. Controllo disponibilità inventario
-        if not self.product_db.check_product_availability(product_id, quantity):
-            self.audit_logger.log_event("ORDER_FAILED", {"reason": "Stock not available"})
-            return {"status": "error", "message": "Quantità non disponibile."}
-
-        # 6. Calcolo del prezzo base
-        price_before_options = product_details.get("price", 0) * quantity
-        if price_before_options <= 0:
-            self.audit_logger.log_event("ORDER_FAILED", {"reason": "Invalid price"})
-            return {"status": "error", "message": "Prezzo non valido o nullo."}
+        # 2-6. Controlli preliminari: prodotto, frode, conformità, disponibilità e prezzo.
+        # Con una pipeline configurata l'ordine dei controlli è deciso da costi e tassi di rifiuto.
+        order = {"product_id": product_id, "quantity": quantity, "card_details": card_details,
+                 "customer_info": customer_info}
+        if self.order_check_pipeline:
+            check_error = self.order_check_pipeline.run(self, order)
+        else:
+            check_error = self._run_order_checks(order)
+        if check_error:
+            return check_error
+        price_before_options = order["price_before_options"]
 
-        # 7. Aggiunta costi opzioni regalo
+        # 7. Aggiunta costi opzioni regalo (dalla tabella locale se disponibile)
         gift_cost = 0
         if gift_options:
-            gift_cost = self.gift_options_service.get_gift_wrap_price(gift_options)
+            gift_pricing = self.gift_pricing_table or self.gift_options_service
+            gift_cost = gift_pricing.get_gift_wrap_price(gift_options)
 
         price_with_gift = price_before_options + gift_cost
 
@@ -147,20 +167,33 @@ class OnlineStoreManager:
             # 10a. Aggiornamento inventario
             self.inventory_sys.update_stock(product_id, -quantity)
 
-            # 10b. Pianificazione spedizione
-            self.shipping_service.schedule_shipment(product_id, quantity, customer_info["address"])
-
-            # 10c. Invio notifica al cliente
-            self.notification_service.send_order_confirmation(customer_info["email"], transaction_id)
-
-            # 10d. Aggiornamento cronologia cliente nel CRM
-            self.crm_system.update_customer_history(customer_info["id"], transaction_id, total_price)
-
-            # 10e. Assegnazione punti fedeltà
-            self.loyalty_manager.award_points(customer_info["id"], total_price)
-
-            # 10f. Tracciamento vendita per analytics
-            self.analytics_tracker.track_sale(product_id, quantity, total_price)
+            # 10b. Pianificazione spedizione (consolidata con gli altri ordini allo stesso indirizzo se disponibile)
+            if self.shipment_consolidator:
+                self.shipment_consolidator.add(product_id, quantity, customer_info["address"])
+            else:
+                self.shipping_service.schedule_shipment(product_id, quantity, customer_info["address"])
+
+            # 10c. Invio notifica al cliente (in coda se disponibile): un errore non annulla l'ordine
+            try:
+                if self.notification_pipeline:
+                    self.notification_pipeline.enqueue(customer_info["email"], product_id, quantity, transaction_id)
+                else:
+                    self.notification_service.send_order_confirmation(customer_info["email"], product_id, quantity)
+            except Exception as e:
+                self.audit_logger.log_event("NOTIFICATION_FAILED", {"email": customer_info["email"], "error": str(e)})
+
+            # 10d-10e. Aggiornamento cronologia CRM e assegnazione punti fedeltà (a lotti se disponibile)
+            if self.customer_update_batcher:
+                self.customer_update_batcher.add(customer_info["id"], transaction_id, total_price)
+            else:
+                self.crm_system.update_customer_history(customer_info["id"], transaction_id, total_price)
+                self.loyalty_manager.award_points(customer_info["id"], total_price)
+
+            # 10f. Tracciamento vendita per analytics (aggregato localmente se disponibile)
+            if self.sales_aggregator:
+                self.sales_aggregator.record_sale(product_id, quantity, total_price)
+            else:
+                self.analytics_tracker.track_sale(product_id, quantity, total_price)
 
             # 10g. Log di successo finale
             self.audit_logger.log_event("ORDER_SUCCESS", {"transaction_id": transaction_id, "amount": total_price})
@@ -175,6 +208,81 @@ class OnlineStoreManager:
 
 
 
+    def _admit(self, operation, priority, customer_id=None):
+        """Restituisce il risultato di errore se la richiesta va rifiutata per sovraccarico, altrimenti None."""
+        if not self.admission_controller or self.admission_controller.admit(priority, customer_id):
+            return None
+        self.audit_logger.log_event("REQUEST_REJECTED", {"reason": "Load shedding", "operation": operation})
+        return {"status": "error", "message": "Servizio sovraccarico, riprovare più tardi."}
+
+    @staticmethod
+    def default_order_check_pipeline(adaptive=True):
+        """
+        Crea la pipeline dei controlli preliminari di `process_order`, con i costi
+        relativi dei servizi coinvolti: le letture dal database costano poco,
+        l'analisi anti-frode è il controllo più costoso e viene sempre eseguita dopo
+        i controlli sul prodotto, così un ordine non evadibile non paga mai lo scoring.
+        """
+        return CheckPipeline([
+            CheckStage("product_found", OnlineStoreManager._check_product_found, cost=1.0),
+            CheckStage("stock_available", OnlineStoreManager._check_stock_available, cost=1.0),
+            CheckStage("valid_price", OnlineStoreManager._check_valid_price, cost=0.1,
+                       depends_on=("product_found",)),
+            CheckStage("shipping_compliance", OnlineStoreManager._check_shipping_compliance, cost=5.0),
+            CheckStage("not_fraudulent", OnlineStoreManager._check_not_fraudulent, cost=50.0,
+                       depends_on=("product_found", "stock_available", "valid_price")),
+        ], adaptive=adaptive)
+
+    def _run_order_checks(self, order):
+        """Esegue i controlli preliminari nell'ordine storico, fermandosi al primo fallimento."""
+        for check in (self._check_product_found, self._check_not_fraudulent, self._check_shipping_compliance,
+                      self._check_stock_available, self._check_valid_price):
+            check_error = check(order)
+            if check_error:
+                return check_error
+        return None
+
+    def _check_product_found(self, order):
+        """2. Recupero dettagli prodotto."""
+        order["product_details"] = self.product_db.get_product_details(order["product_id"])
+        if not order["product_details"]:
+            self.audit_logger.log_event("ORDER_FAILED", {"reason": "Product not found"})
+            return {"status": "error", "message": "Prodotto non trovato."}
+        return None
+
+    def _check_not_fraudulent(self, order):
+        """3. Controllo anti-frode."""
+        customer_info = order["customer_info"]
+        if self.fraud_detector.is_fraudulent(customer_info, order["card_details"]):
+            self.audit_logger.log_event("ORDER_FAILED",
+                                        {"reason": "Fraud detected", "customer_id": customer_info.get("id")})
+            return {"status": "error", "message": "L'ordine è stato bloccato per sospetta frode."}
+        return None
+
+    def _check_shipping_compliance(self, order):
+        """4. Verifica conformità spedizione."""
+        address = order["customer_info"]["address"]
+        if not self.compliance_checker.verify_shipment(order["product_id"], address):
+            self.audit_logger.log_event("ORDER_FAILED", {"reason": "Compliance check failed", "address": address})
+            return {"status": "error",
+                    "message": "Prodotto non spedibile a questo indirizzo per restrizioni normative."}
+        return None
+
+    def _check_stock_available(self, order):
+        """5. Controllo disponibilità inventario."""
+        if not self.product_db.check_product_availability(order["product_id"], order["quantity"]):
+            self.audit_logger.log_event("ORDER_FAILED", {"reason": "Stock not available"})
+            return {"status": "error", "message": "Quantità non disponibile."}
+        return None
+
+    def _check_valid_price(self, order):
+        """6. Calcolo del prezzo base."""
+        order["price_before_options"] = order["product_details"].get("price", 0) * order["quantity"]
+        if order["price_before_options"] <= 0:
+            self.audit_logger.log_event("ORDER_FAILED", {"reason": "Invalid price"})
+            return {"status": "error", "message": "Prezzo non valido o nullo."}
+        return None
+
     def add_stock(self, product_id, quantity):
         """Aggiunge una quantità di un prodotto all'inventario."""
         if not isinstance(quantity, int) or quantity <= 0:
@@ -188,16 +296,23 @@ class OnlineStoreManager:
         if not (0 < discount_percentage <= 100):
             raise ValueError("La percentuale di sconto deve essere tra 1 e 100.")
 
-        product_details = self.product_db.get_product_details(product_id)
-        if not product_details or "price" not in product_details:
-            return None
+        # Il prezzo base viene letto dalla vista materializzata se il prodotto è presente
+        original_price = self.price_view.get_base_price(product_id) if self.price_view else None
+        if original_price is None:
+            product_details = self.product_db.get_product_details(product_id)
+            if not product_details or "price" not in product_details:
+                return None
+            original_price = product_details["price"]
 
-        original_price = product_details["price"]
         new_price = original_price * (1 - discount_percentage / 100)
         return round(new_price, 2)
 
     def process_refund(self, product_id, quantity, transaction_id):
         """Gestisce il rimborso per un prodotto, ripristinando lo stock."""
+        rejection = self._admit("process_refund", PRIORITY_REFUND)
+        if rejection:
+            return rejection
+
         self.audit_logger.log_event("REFUND_PROCESS_STARTED", {"transaction_id": transaction_id})
         if quantity <= 0:
             return {"status": "error", "message": "La quantità da rimborsare deve essere positiva."}
@@ -220,6 +335,11 @@ class OnlineStoreManager:
 
     def get_price_with_promo_code(self, product_id, promo_code):
         """Calcola il prezzo di un prodotto applicando un codice promozionale valido."""
+        if self.price_view:
+            cached_result = self.price_view.get_price_with_promo(product_id, promo_code)
+            if cached_result is not None:
+                return cached_result
+
         product_details = self.product_db.get_product_details(product_id)
         if not product_details:
             return {"status": "error", "message": "Prodotto non trovato."}
@@ -236,6 +356,10 @@ class OnlineStoreManager:
         """
         Converte il prezzo di un prodotto in una valuta specifica.
         """
+        if (self.price_view and self.price_view.has_currency(currency_code)
+                and self.price_view.get_base_price(product_id) is not None):
+            return self.price_view.get_price_in_currency(product_id, currency_code)
+
         product_details = self.product_db.get_product_details(product_id)
         if not product_details:
             return None
@@ -254,6 +378,10 @@ class OnlineStoreManager:
         """
         Gestisce l'acquisto di un prodotto digitale.
         """
+        rejection = self._admit("process_digital_order", PRIORITY_ORDER, (customer_info or {}).get("id"))
+        if rejection:
+            return rejection
+
         product_details = self.product_db.get_product_details(product_id)
         if not product_details or not product_details.get("is_digital"):
             return {"status": "error", "message": "Prodotto non digitale."}
@@ -262,7 +390,9 @@ class OnlineStoreManager:
         payment_result = self.payment_gw.process_payment(total_price, card_details)
 
         if payment_result and payment_result.get("status") == "success":
-            download_link = self.digital_asset_manager.generate_download_link(product_id, customer_info["id"])
+            # Il link viene firmato localmente se disponibile, senza chiamare il servizio remoto
+            link_generator = self.download_link_signer or self.digital_asset_manager
+            download_link = link_generator.generate_download_link(product_id, customer_info["id"])
             return {"status": "success", "download_link": download_link}
         else:
             return {"status": "error", "message": "Pagamento fallito."}
@@ -278,5 +408,53 @@ class OnlineStoreManager:
         if not product_details.get("is_returnable"):
             return {"status": "error", "message": "Questo prodotto non può essere restituito."}
 
-        rma_ticket = self.rma_manager.create_rma_ticket(product_id, transaction_id)
-        return {"status": "success", "rma_ticket": rma_ticket}
\ No newline at end of file
+        rma_ticket = self._create_rma_tickets([(product_id, transaction_id)])[0]
+        return {"status": "success", "rma_ticket": rma_ticket}
+
+    def request_returns(self, returns):
+        """
+        Inizia più richieste di reso (RMA) con un'unica lettura dei prodotti.
+
+        Args:
+            returns (list): Coppie (product_id, transaction_id) da restituire.
+
+        Returns:
+            list: Un risultato per ogni coppia, nello stesso ordine e nello stesso formato di `request_return`.
+        """
+        if not returns:
+            return []
+
+        product_ids = list(dict.fromkeys(product_id for product_id, _ in returns))
+        products = self.product_db.get_products_details(product_ids) or {}
+
+        results = []
+        accepted = []
+        for product_id, transaction_id in returns:
+            product_details = products.get(product_id)
+            if not product_details:
+                results.append({"status": "error", "message": "Prodotto non trovato."})
+            elif not product_details.get("is_returnable"):
+                results.append({"status": "error", "message": "Questo prodotto non può essere restituito."})
+            else:
+                results.append(None)
+                accepted.append((len(results) - 1, product_id, transaction_id))
+
+        tickets = self._create_rma_tickets([(product_id, transaction_id) for _, product_id, transaction_id in accepted])
+        for (index, _, _), rma_ticket in zip(accepted, tickets):
+            results[index] = {"status": "success", "rma_ticket": rma_ticket}
+        return results
+
+    def _create_rma_tickets(self, returns):
+        """Crea i ticket RMA, con ID assegnati localmente e un'unica chiamata se l'allocatore è disponibile."""
+        if not returns:
+            return []
+        if not self.rma_ticket_allocator:
+            return [self.rma_manager.create_rma_ticket(product_id, transaction_id)
+                    for product_id, transaction_id in returns]
+
+        ticket_ids = self.rma_ticket_allocator.allocate(len(returns))
+        self.rma_manager.create_rma_tickets([
+            {"ticket_id": ticket_id, "product_id": product_id, "transaction_id": transaction_id}
+            for ticket_id, (product_id, transaction_id) in zip(ticket_ids, returns)
+        ])
+        return ticket_ids
\ No newline at end of file
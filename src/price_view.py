@@ -0,0 +1,140 @@
+# Questo file contiene la vista materializzata dei prezzi dei prodotti.
+# Per ogni prodotto vengono precalcolati i prezzi finali in ogni valuta attiva e
+# con ogni codice promozionale attivo, così le pagine di elenco possono leggere
+# centinaia di prezzi senza alcuna chiamata remota.
+
+import threading
+
+
+class PriceView:
+    """
+    Indice in memoria dei prezzi finali per prodotto.
+
+    La vista viene costruita con `load` e aggiornata in modo incrementale:
+    un cambio di prezzo ricalcola solo la riga del prodotto, un cambio di tasso
+    di cambio o di codice promozionale ricalcola solo la colonna corrispondente.
+    I prezzi sono arrotondati come in OnlineStoreManager.
+    """
+
+    def __init__(self, product_db, currency_converter, promo_validator, currencies=(), promo_codes=()):
+        if not all([product_db, currency_converter, promo_validator]):
+            raise ValueError("Tutte le dipendenze devono essere fornite.")
+
+        self.product_db = product_db
+        self.currency_converter = currency_converter
+        self.promo_validator = promo_validator
+        self._currencies = [currency.upper() for currency in currencies if currency.upper() != "EUR"]
+        self._promo_codes = list(promo_codes)
+
+        self._base_prices = {}
+        self._rates = {}
+        # {promo_code: percentuale di sconto, oppure None se il codice non è valido}
+        self._discounts = {}
+        # {product_id: {"currency": {valuta: prezzo}, "promo": {codice: prezzo}}}
+        self._rows = {}
+        self._lock = threading.Lock()
+
+    def load(self, product_ids):
+        """Costruisce la vista per i prodotti indicati, con una sola lettura dal database."""
+        products = self.product_db.get_products_details(list(product_ids)) or {}
+        rates = {currency: self.currency_converter.get_rate("EUR", currency) for currency in self._currencies}
+        discounts = {code: self._discount_for(code) for code in self._promo_codes}
+
+        with self._lock:
+            self._rates = rates
+            self._discounts = discounts
+            self._base_prices = {product_id: details["price"] for product_id, details in products.items()
+                                 if details and "price" in details}
+            self._rows = {product_id: self._build_row(price) for product_id, price in self._base_prices.items()}
+
+    def on_product_price_changed(self, product_id, new_price):
+        """Aggiorna la riga di un prodotto dopo un cambio di prezzo (None per rimuoverlo)."""
+        with self._lock:
+            if new_price is None:
+                self._base_prices.pop(product_id, None)
+                self._rows.pop(product_id, None)
+                return
+            self._base_prices[product_id] = new_price
+            self._rows[product_id] = self._build_row(new_price)
+
+    def on_rate_changed(self, currency_code, rate):
+        """Ricalcola la colonna di una valuta dopo un cambio del tasso (None se non più disponibile)."""
+        currency_code = currency_code.upper()
+        with self._lock:
+            if currency_code not in self._currencies:
+                self._currencies.append(currency_code)
+            self._rates[currency_code] = rate
+            for product_id, price in self._base_prices.items():
+                self._rows[product_id]["currency"][currency_code] = self._convert(price, rate)
+
+    def on_promo_changed(self, promo_code, validation_result=None):
+        """
+        Ricalcola la colonna di un codice promozionale. Se `validation_result` non è
+        fornito, il codice viene validato di nuovo con il PromoCodeValidator.
+        """
+        if validation_result is None:
+            discount = self._discount_for(promo_code)
+        else:
+            discount = self._discount_from(validation_result)
+        with self._lock:
+            if promo_code not in self._promo_codes:
+                self._promo_codes.append(promo_code)
+            self._discounts[promo_code] = discount
+            for product_id, price in self._base_prices.items():
+                self._rows[product_id]["promo"][promo_code] = self._apply(price, discount)
+
+    def get_base_price(self, product_id):
+        """Prezzo base in EUR, oppure None se il prodotto non è nella vista."""
+        return self._base_prices.get(product_id)
+
+    def get_price_in_currency(self, product_id, currency_code):
+        """
+        Prezzo nella valuta indicata, come `OnlineStoreManager.get_product_price_in_currency`.
+        Restituisce None se il prodotto o la valuta non sono nella vista.
+        """
+        if currency_code.upper() == "EUR":
+            return self._base_prices.get(product_id)
+        row = self._rows.get(product_id)
+        if row is None:
+            return None
+        return row["currency"].get(currency_code.upper())
+
+    def get_price_with_promo(self, product_id, promo_code):
+        """
+        Risultato come `OnlineStoreManager.get_price_with_promo_code`, oppure None
+        se il prodotto o il codice non sono nella vista.
+        """
+        row = self._rows.get(product_id)
+        if row is None or promo_code not in row["promo"]:
+            return None
+        new_price = row["promo"][promo_code]
+        if new_price is None:
+            return {"status": "error", "message": "Codice promozionale non valido o scaduto."}
+        return {"status": "success", "new_price": new_price}
+
+    def has_currency(self, currency_code):
+        """Indica se la vista contiene la valuta (EUR è sempre disponibile)."""
+        return currency_code.upper() == "EUR" or currency_code.upper() in self._currencies
+
+    def _build_row(self, price):
+        return {
+            "currency": {currency: self._convert(price, self._rates.get(currency)) for currency in self._currencies},
+            "promo": {code: self._apply(price, self._discounts.get(code)) for code in self._promo_codes},
+        }
+
+    def _discount_for(self, promo_code):
+        return self._discount_from(self.promo_validator.validate_code(promo_code))
+
+    @staticmethod
+    def _discount_from(validation_result):
+        if validation_result and validation_result.get("is_valid"):
+            return validation_result.get("discount_percentage", 0)
+        return None
+
+    @staticmethod
+    def _convert(price, rate):
+        return None if rate is None else round(price * rate, 2)
+
+    @staticmethod
+    def _apply(price, discount):
+        return None if discount is None else round(price * (1 - discount / 100), 2)
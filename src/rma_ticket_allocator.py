@@ -0,0 +1,48 @@
+# Questo file contiene l'allocatore locale degli ID dei ticket RMA.
+# Ogni worker riserva dal RMAManager un blocco di ID consecutivi e li assegna
+# senza ulteriori chiamate, così gli ID sono univoci e non servono tentativi ripetuti.
+
+import threading
+
+
+class RMATicketAllocator:
+    """
+    Assegna ID di ticket RMA monotoni a partire da blocchi riservati.
+
+    Il RMAManager garantisce che i blocchi restituiti da `reserve_ticket_block` non si
+    sovrappongano, quindi worker diversi non devono coordinarsi per ogni ticket.
+    """
+
+    def __init__(self, rma_manager, block_size=1000, prefix="RMA"):
+        if not rma_manager:
+            raise ValueError("Il gestore RMA deve essere fornito.")
+        if not isinstance(block_size, int) or block_size <= 0:
+            raise ValueError("La dimensione del blocco deve essere un intero positivo.")
+
+        self.rma_manager = rma_manager
+        self.block_size = block_size
+        self.prefix = prefix
+        self._next_id = 0
+        self._block_end = 0
+        self._lock = threading.Lock()
+
+    def next_ticket_id(self):
+        """Restituisce il prossimo ID di ticket, riservando un nuovo blocco se quello corrente è esaurito."""
+        return self.allocate(1)[0]
+
+    def allocate(self, count):
+        """Restituisce `count` ID di ticket consecutivi (a meno dei cambi di blocco)."""
+        if not isinstance(count, int) or count <= 0:
+            raise ValueError("Il numero di ticket deve essere un intero positivo.")
+
+        ticket_ids = []
+        with self._lock:
+            while len(ticket_ids) < count:
+                if self._next_id >= self._block_end:
+                    # Per richieste grandi si riserva direttamente un blocco sufficiente
+                    size = max(self.block_size, count - len(ticket_ids))
+                    self._next_id = self.rma_manager.reserve_ticket_block(size)
+                    self._block_end = self._next_id + size
+                ticket_ids.append(f"{self.prefix}-{self._next_id}")
+                self._next_id += 1
+        return ticket_ids
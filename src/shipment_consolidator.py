@@ -0,0 +1,171 @@
+# Questo file contiene il consolidamento delle spedizioni: le righe d'ordine
+# dirette allo stesso indirizzo entro una finestra di tempo vengono unite in
+# un'unica spedizione multi-articolo e inviate a lotti al ShippingService.
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_address(address):
+    """Normalizza un indirizzo per il confronto (minuscole, senza punteggiatura né spazi doppi)."""
+    address = re.sub(r"[^\w\s]", " ", str(address).lower())
+    return " ".join(address.split())
+
+
+class ShipmentConsolidator:
+    """
+    Raccoglie le richieste di spedizione per `window_seconds` secondi e unisce quelle
+    dirette allo stesso indirizzo normalizzato.
+
+    Le spedizioni in attesa sono indicizzate per indirizzo in un OrderedDict: l'unione
+    di una nuova riga costa O(1) e, poiché le spedizioni sono ordinate per apertura,
+    quelle scadute si trovano sempre in testa. Le spedizioni scadute vengono inviate
+    a ogni `add` e, dopo `start()`, anche da un thread in background, così non restano
+    in attesa quando gli ordini si fermano.
+
+    La chiamata al corriere avviene fuori dal lock, così gli ordini concorrenti non
+    ne attendono la latenza. Dopo un invio fallito le spedizioni tornano in attesa e
+    gli invii automatici vengono sospesi per `retry_backoff` secondi.
+    """
+
+    def __init__(self, shipping_service, audit_logger=None, window_seconds=300.0, retry_backoff=30.0,
+                 clock=time.time):
+        if not shipping_service:
+            raise ValueError("Il servizio di spedizione deve essere fornito.")
+        if window_seconds <= 0:
+            raise ValueError("La finestra di consolidamento deve essere positiva.")
+
+        self.shipping_service = shipping_service
+        self.audit_logger = audit_logger
+        self.window_seconds = window_seconds
+        self.retry_backoff = retry_backoff
+        self._clock = clock
+        self._retry_after = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._worker = None
+        # {indirizzo normalizzato: {"address": str, "items": {product_id: quantità}, "opened_at": float}}
+        self._pending = OrderedDict()
+
+    def add(self, product_id, quantity, address):
+        """
+        Aggiunge una riga d'ordine alla spedizione in attesa per lo stesso indirizzo e invia
+        quelle scadute. La riga viene registrata prima dell'invio: un errore del corriere
+        viene registrato e le spedizioni restano in attesa, senza far fallire l'ordine.
+        """
+        if not isinstance(quantity, int) or quantity <= 0:
+            raise ValueError("La quantità deve essere un intero positivo.")
+
+        key = normalize_address(address)
+        with self._lock:
+            shipment = self._pending.get(key)
+            if shipment is None:
+                shipment = {"address": address, "items": {}, "opened_at": self._clock()}
+                self._pending[key] = shipment
+            shipment["items"][product_id] = shipment["items"].get(product_id, 0) + quantity
+
+        self._flush_due_and_log()
+
+    def flush_due(self):
+        """Invia le spedizioni la cui finestra di consolidamento è scaduta, salvo durante il backoff."""
+        now = self._clock()
+        with self._lock:
+            if self._retry_after is not None and now < self._retry_after:
+                return []
+            due = []
+            for key, shipment in self._pending.items():
+                if now - shipment["opened_at"] < self.window_seconds:
+                    break
+                due.append(key)
+            taken = self._take(due)
+        return self._submit(taken)
+
+    def flush(self):
+        """Invia subito tutte le spedizioni in attesa, anche durante il backoff."""
+        with self._lock:
+            taken = self._take(list(self._pending))
+        return self._submit(taken)
+
+    def start(self, interval=None):
+        """
+        Avvia l'invio periodico delle spedizioni scadute, ogni `interval` secondi
+        (default: un decimo della finestra).
+        """
+        if self._worker and self._worker.is_alive():
+            return
+        self._stop_event.clear()
+        self._worker = threading.Thread(target=self._run, args=(interval or self.window_seconds / 10,),
+                                        name="shipment-consolidator", daemon=True)
+        self._worker.start()
+
+    def stop(self, timeout=None):
+        """Ferma l'invio periodico dopo aver inviato tutte le spedizioni ancora in attesa."""
+        if not self._worker:
+            return
+        self._stop_event.set()
+        self._worker.join(timeout)
+        self._worker = None
+
+    def pending_count(self):
+        """Restituisce il numero di spedizioni (indirizzi) in attesa."""
+        with self._lock:
+            return len(self._pending)
+
+    def _run(self, interval):
+        """Ciclo di invio periodico; all'arresto invia tutte le spedizioni rimaste."""
+        while not self._stop_event.wait(interval):
+            self._flush_due_and_log()
+        try:
+            self.flush()
+        except Exception as e:
+            self._log_failure(e)
+
+    def _flush_due_and_log(self):
+        """Invia le spedizioni scadute registrando, invece di propagare, un eventuale errore."""
+        try:
+            self.flush_due()
+        except Exception as e:
+            self._log_failure(e)
+
+    def _log_failure(self, error):
+        if self.audit_logger:
+            self.audit_logger.log_event("SHIPMENT_SUBMISSION_FAILED", {"error": str(error)})
+
+    def _take(self, keys):
+        """Rimuove dall'indice le spedizioni indicate e le restituisce. Va chiamato con il lock acquisito."""
+        return [(key, self._pending.pop(key)) for key in keys]
+
+    def _submit(self, taken):
+        """
+        Invia in un'unica chiamata, fuori dal lock, le spedizioni prelevate con `_take`.
+        Se l'invio fallisce le spedizioni tornano in testa all'indice, unite alle righe
+        arrivate nel frattempo per lo stesso indirizzo, e l'errore viene propagato.
+        """
+        if not taken:
+            return []
+
+        shipments = [
+            {"address": shipment["address"],
+             "items": [{"product_id": product_id, "quantity": quantity}
+                       for product_id, quantity in shipment["items"].items()]}
+            for _, shipment in taken
+        ]
+        try:
+            self.shipping_service.schedule_bulk_shipments(shipments)
+        except Exception:
+            with self._lock:
+                self._retry_after = self._clock() + self.retry_backoff
+                for key, shipment in reversed(taken):
+                    newer = self._pending.pop(key, None)
+                    if newer:
+                        for product_id, quantity in newer["items"].items():
+                            shipment["items"][product_id] = shipment["items"].get(product_id, 0) + quantity
+                    self._pending[key] = shipment
+                    self._pending.move_to_end(key, last=False)
+            raise
+
+        with self._lock:
+            self._retry_after = None
+        return shipments
@@ -0,0 +1,114 @@
+# Questo file contiene il registratore del traffico verso OnlineStoreManager.
+# Le chiamate ai metodi pubblici vengono scritte in una traccia JSONL (una riga per
+# chiamata), con i dati personali sostituiti da pseudonimi, per poterle poi
+# riprodurre con il generatore di carico.
+
+import functools
+import hashlib
+import inspect
+import json
+import secrets
+import threading
+import time
+
+from src.method_wrapping import wrap_methods, unwrap_methods
+
+RECORDED_METHODS = (
+    "process_order", "process_digital_order", "process_refund",
+    "apply_discount", "get_price_with_promo_code", "get_product_price_in_currency",
+)
+
+REDACTED = "<redacted>"
+
+
+def scrub_pii(arguments, salt):
+    """
+    Restituisce una copia degli argomenti di una chiamata senza dati personali.
+
+    I dati della carta vengono rimossi; tutti i campi del cliente e i testi delle opzioni
+    regalo (es. i messaggi dei biglietti) vengono sostituiti da pseudonimi stabili (stesso
+    valore -> stesso pseudonimo), così la traccia conserva il raggruppamento per cliente
+    e per indirizzo. I valori non testuali delle opzioni regalo restano invariati.
+    """
+    def pseudonym(value):
+        return hashlib.sha256(f"{salt}:{value}".encode()).hexdigest()[:12]
+
+    def scrub_text(value):
+        if isinstance(value, str):
+            return f"text-{pseudonym(value)}"
+        if isinstance(value, dict):
+            return {key: scrub_text(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [scrub_text(item) for item in value]
+        return value
+
+    scrubbed = dict(arguments)
+    if "card_details" in scrubbed:
+        scrubbed["card_details"] = REDACTED
+    if "gift_options" in scrubbed:
+        scrubbed["gift_options"] = scrub_text(scrubbed["gift_options"])
+    customer_info = scrubbed.get("customer_info")
+    if isinstance(customer_info, dict):
+        scrubbed["customer_info"] = {
+            key: f"{key}-{pseudonym(value)}" for key, value in customer_info.items()
+            if key not in ("id", "email", "address")
+        }
+        scrubbed["customer_info"].update({
+            "id": f"cust-{pseudonym(customer_info.get('id'))}",
+            "email": f"{pseudonym(customer_info.get('email'))}@example.invalid",
+            "address": f"addr-{pseudonym(customer_info.get('address'))}",
+        })
+    elif customer_info is not None:
+        scrubbed["customer_info"] = REDACTED
+    return scrubbed
+
+
+class TrafficRecorder:
+    """
+    Registra le chiamate a un OnlineStoreManager in un file JSONL.
+
+    Ogni riga contiene l'istante della chiamata in secondi dall'inizio della
+    registrazione (`ts`), il nome del metodo e gli argomenti per nome.
+    """
+
+    def __init__(self, output, salt=None, methods=RECORDED_METHODS):
+        self._output = output
+        self._salt = salt if salt is not None else secrets.token_hex(16)
+        self.methods = tuple(methods)
+        self._lock = threading.Lock()
+        self._store_manager = None
+        self._layers = {}
+        self._started_at = None
+
+    def attach(self, store_manager):
+        """Inizia a registrare le chiamate del gestore indicato."""
+        if self._store_manager is not None:
+            raise RuntimeError("Il registratore è già collegato a un gestore.")
+        self._store_manager = store_manager
+        self._started_at = time.monotonic()
+        self._layers = wrap_methods(store_manager, self.methods, self._wrap)
+
+    def detach(self):
+        """Smette di registrare e ripristina i metodi del gestore, anche se altri strumenti li avvolgono."""
+        if self._store_manager is None:
+            return
+        unwrap_methods(self._store_manager, self._layers)
+        self._store_manager = None
+        self._layers = {}
+
+    def _wrap(self, name, method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def recorded(*args, **kwargs):
+            arguments = signature.bind(*args, **kwargs).arguments
+            self._write({"ts": round(time.monotonic() - self._started_at, 6), "method": name,
+                         "args": scrub_pii(arguments, self._salt)})
+            return method(*args, **kwargs)
+
+        return recorded
+
+    def _write(self, event):
+        line = json.dumps(event, default=str, separators=(",", ":"))
+        with self._lock:
+            self._output.write(line + "\n")
@@ -0,0 +1,141 @@
+import threading
+import time
+import unittest
+
+from src.admission_controller import AdmissionController, TokenBucket, PRIORITY_ORDER, PRIORITY_REFUND
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def setUp(self):
+        """Configura un bucket con un orologio controllabile."""
+        self.now = 0.0
+        self.bucket = TokenBucket(rate=2, capacity=2, clock=lambda: self.now)
+
+    def test_init_raises_error_for_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0, capacity=1)
+
+    def test_init_raises_error_for_capacity_below_one_token(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0.1, capacity=0.5)
+
+    def test_try_acquire_consumes_up_to_capacity(self):
+        self.assertTrue(self.bucket.try_acquire())
+        self.assertTrue(self.bucket.try_acquire())
+        self.assertFalse(self.bucket.try_acquire())
+
+    def test_tokens_refill_over_time_without_exceeding_capacity(self):
+        self.bucket.try_acquire(2)
+        self.assertEqual(self.bucket.time_until_available(), 0.5)
+        self.now += 10
+        self.assertTrue(self.bucket.try_acquire(2))
+        self.assertFalse(self.bucket.try_acquire())
+
+    def test_refund_does_not_exceed_capacity(self):
+        self.bucket.try_acquire()
+        self.bucket.refund()
+        self.bucket.refund()
+        self.assertTrue(self.bucket.try_acquire(2))
+        self.assertFalse(self.bucket.try_acquire())
+
+
+
+class TestAdmissionController(unittest.TestCase):
+
+    def test_admit_within_global_burst(self):
+        controller = AdmissionController(global_rate=1, global_burst=2, max_wait=0)
+        self.assertTrue(controller.admit())
+        self.assertTrue(controller.admit())
+        self.assertFalse(controller.admit())
+
+    def test_per_customer_limit_rejects_without_consuming_global_tokens(self):
+        controller = AdmissionController(global_rate=100, per_customer_rate=1, max_wait=0)
+        self.assertTrue(controller.admit(customer_id="CUST001"))
+        self.assertFalse(controller.admit(customer_id="CUST001"))
+        self.assertTrue(controller.admit(customer_id="CUST002"))
+
+    def test_rates_below_one_per_second_admit_one_request(self):
+        now = [0.0]
+        controller = AdmissionController(global_rate=0.5, per_customer_rate=0.1, max_wait=0, clock=lambda: now[0])
+        self.assertEqual([controller.admit(customer_id="CUST001") for _ in range(3)], [True, False, False])
+
+        now[0] += 10
+        self.assertTrue(controller.admit(customer_id="CUST001"))
+
+    def test_global_rejection_refunds_customer_token(self):
+        for max_queue in (0, 100):
+            now = [0.0]
+            controller = AdmissionController(global_rate=1, per_customer_rate=0.01, per_customer_burst=1,
+                                             max_queue=max_queue, max_wait=0, clock=lambda: now[0])
+            controller.admit()
+            self.assertFalse(controller.admit(customer_id="CUST001"))
+
+            now[0] += 1
+            self.assertTrue(controller.admit(customer_id="CUST001"))
+
+    def test_full_queue_rejects_immediately(self):
+        controller = AdmissionController(global_rate=1, max_queue=0, max_wait=10)
+        controller.admit()
+        started_at = time.monotonic()
+        self.assertFalse(controller.admit())
+        self.assertLess(time.monotonic() - started_at, 1)
+
+    def test_waiting_request_is_admitted_when_token_arrives(self):
+        controller = AdmissionController(global_rate=50, global_burst=1, max_wait=1)
+        controller.admit()
+        self.assertTrue(controller.admit())
+
+    def test_waiting_request_is_rejected_after_deadline(self):
+        controller = AdmissionController(global_rate=1, global_burst=1, max_wait=0.05)
+        controller.admit()
+        self.assertFalse(controller.admit())
+        self.assertEqual(controller.queue_length(), 0)
+
+    def test_refunds_are_served_before_queued_orders(self):
+        controller = AdmissionController(global_rate=10, global_burst=1, max_wait=2)
+        controller.admit()
+        admitted = []
+
+        def request(priority, name):
+            if controller.admit(priority):
+                admitted.append(name)
+
+        order = threading.Thread(target=request, args=(PRIORITY_ORDER, "order"))
+        order.start()
+        while controller.queue_length() < 1:
+            time.sleep(0.001)
+        # Riempie la coda prima che arrivi il token, poi accoda il rimborso
+        second_order = threading.Thread(target=request, args=(PRIORITY_ORDER, "second_order"))
+        refund = threading.Thread(target=request, args=(PRIORITY_REFUND, "refund"))
+        second_order.start()
+        refund.start()
+        for thread in (order, second_order, refund):
+            thread.join()
+
+        self.assertLess(admitted.index("refund"), admitted.index("second_order"))
+
+    def test_refund_takes_slot_of_queued_order_when_queue_is_full(self):
+        controller = AdmissionController(global_rate=2, global_burst=1, max_queue=1, max_wait=2)
+        controller.admit()
+        results = {}
+
+        def request(priority, name):
+            results[name] = controller.admit(priority)
+
+        order = threading.Thread(target=request, args=(PRIORITY_ORDER, "order"))
+        order.start()
+        while controller.queue_length() < 1:
+            time.sleep(0.001)
+        self.assertFalse(controller.admit(PRIORITY_ORDER))
+
+        refund = threading.Thread(target=request, args=(PRIORITY_REFUND, "refund"))
+        refund.start()
+        for thread in (order, refund):
+            thread.join()
+
+        self.assertEqual(results, {"order": False, "refund": True})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,114 @@
+import unittest
+from unittest.mock import MagicMock
+
+from src.analytics_aggregator import SalesAggregator
+from src.external_dependencies import AnalyticsTracker, AuditLogger
+
+
+class TestSalesAggregator(unittest.TestCase):
+
+    def setUp(self):
+        """Configura un aggregatore con un orologio controllabile."""
+        self.mock_analytics_tracker = MagicMock(spec=AnalyticsTracker)
+        self.mock_audit_logger = MagicMock(spec=AuditLogger)
+        self.now = 1_000_020.0
+        self.aggregator = SalesAggregator(self.mock_analytics_tracker, self.mock_audit_logger, window_minutes=5,
+                                          flush_interval=30, clock=lambda: self.now)
+
+    def test_init_raises_error_without_tracker(self):
+        with self.assertRaises(ValueError):
+            SalesAggregator(None)
+
+    def test_init_raises_error_for_invalid_window(self):
+        with self.assertRaises(ValueError):
+            SalesAggregator(self.mock_analytics_tracker, window_minutes=0)
+
+    def test_record_sale_does_not_call_tracker_before_interval(self):
+        self.aggregator.record_sale("P1", 2, 20.0)
+        self.aggregator.record_sale("P1", 1, 10.0)
+        self.mock_analytics_tracker.track_sale.assert_not_called()
+        self.mock_analytics_tracker.track_sales_batch.assert_not_called()
+
+    def test_record_sale_flushes_merged_batch_after_interval(self):
+        self.aggregator.record_sale("P1", 2, 20.0)
+        self.aggregator.record_sale("P2", 1, 5.0)
+        self.now += 31
+        self.aggregator.record_sale("P1", 1, 10.0)
+
+        self.mock_analytics_tracker.track_sales_batch.assert_called_once_with([
+            {"product_id": "P1", "quantity": 3, "amount": 30.0},
+            {"product_id": "P2", "quantity": 1, "amount": 5.0},
+        ])
+
+    def test_flush_with_nothing_pending_does_not_call_tracker(self):
+        self.assertEqual(self.aggregator.flush(), [])
+        self.mock_analytics_tracker.track_sales_batch.assert_not_called()
+
+    def test_flush_keeps_pending_sales_if_tracker_fails(self):
+        self.aggregator.record_sale("P1", 1, 10.0)
+        self.mock_analytics_tracker.track_sales_batch.side_effect = ConnectionError("Analytics non raggiungibile")
+        with self.assertRaises(ConnectionError):
+            self.aggregator.flush()
+
+        self.mock_analytics_tracker.track_sales_batch.side_effect = None
+        self.assertEqual(self.aggregator.flush(), [{"product_id": "P1", "quantity": 1, "amount": 10.0}])
+
+    def test_record_sale_logs_flush_failure_and_keeps_sales_pending(self):
+        self.mock_analytics_tracker.track_sales_batch.side_effect = ConnectionError("Analytics non raggiungibile")
+        self.aggregator.record_sale("P1", 1, 10.0)
+        self.now += 31
+        self.aggregator.record_sale("P1", 2, 20.0)
+
+        self.mock_audit_logger.log_event.assert_called_once_with(
+            "ANALYTICS_FLUSH_FAILED", {"error": "Analytics non raggiungibile"})
+        self.mock_analytics_tracker.track_sales_batch.side_effect = None
+        self.assertEqual(self.aggregator.flush(), [{"product_id": "P1", "quantity": 3, "amount": 30.0}])
+
+    def test_stop_flushes_pending_sales_from_background_thread(self):
+        self.aggregator.start()
+        self.aggregator.record_sale("P1", 1, 10.0)
+        self.aggregator.stop(timeout=1)
+
+        self.mock_analytics_tracker.track_sales_batch.assert_called_once_with(
+            [{"product_id": "P1", "quantity": 1, "amount": 10.0}])
+
+    def test_top_sellers_reflects_later_updates(self):
+        for _ in range(50):
+            self.aggregator.record_sale("P1", 1, 1.0)
+        self.aggregator.record_sale("P2", 30, 1.0)
+        self.aggregator.record_sale("P2", 30, 1.0)
+
+        self.assertEqual(self.aggregator.top_sellers(2), [("P2", 60), ("P1", 50)])
+        self.assertEqual(self.aggregator.top_sellers(2), [("P2", 60), ("P1", 50)])
+
+    def test_top_sellers_and_top_revenue(self):
+        self.aggregator.record_sale("P1", 10, 10.0)
+        self.aggregator.record_sale("P2", 1, 500.0)
+        self.aggregator.record_sale("P3", 5, 50.0)
+
+        self.assertEqual(self.aggregator.top_sellers(2), [("P1", 10), ("P3", 5)])
+        self.assertEqual(self.aggregator.top_revenue(1), [("P2", 500.0)])
+
+    def test_tumbling_and_sliding_windows(self):
+        self.aggregator.record_sale("P1", 1, 10.0)
+        self.now += 60
+        self.aggregator.record_sale("P1", 2, 20.0)
+
+        self.assertEqual(self.aggregator.current_minute(), {"revenue": 20.0, "units": 2})
+        self.assertEqual(self.aggregator.last_minutes(2), {"revenue": 30.0, "units": 3})
+
+    def test_sliding_window_drops_expired_minutes(self):
+        self.aggregator.record_sale("P1", 1, 10.0)
+        # Dopo 5 minuti la cella viene riutilizzata e il vecchio minuto non conta più
+        self.now += 5 * 60
+        self.aggregator.record_sale("P1", 2, 20.0)
+
+        self.assertEqual(self.aggregator.last_minutes(5), {"revenue": 20.0, "units": 2})
+
+    def test_last_minutes_raises_error_outside_window(self):
+        with self.assertRaises(ValueError):
+            self.aggregator.last_minutes(6)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
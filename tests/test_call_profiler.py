@@ -0,0 +1,121 @@
+import io
+import json
+import os
+import tempfile
+import tracemalloc
+import unittest
+from unittest.mock import MagicMock
+
+from src.call_profiler import CallProfiler, diff_dumps, find_regressions, public_methods
+from src.online_store_manager import OnlineStoreManager
+from src.traffic_recorder import TrafficRecorder
+
+
+class TestCallProfiler(unittest.TestCase):
+
+    def setUp(self):
+        """Configura un profiler che campiona ogni chiamata in una cartella temporanea."""
+        self.store_manager = OnlineStoreManager(*[MagicMock() for _ in range(17)])
+        self.store_manager.product_db.get_product_details.return_value = {"price": 10.0}
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.profiler = CallProfiler(self.temp_dir.name, sample_rate=1.0, dump_every=0, max_dumps=2)
+        self.addCleanup(self.profiler.detach)
+
+    def _write_dump(self, path, methods):
+        with open(path, "w", encoding="utf-8") as dump_file:
+            json.dump({"methods": methods}, dump_file)
+
+    def test_init_raises_error_for_invalid_sample_rate(self):
+        with self.assertRaises(ValueError):
+            CallProfiler(self.temp_dir.name, sample_rate=0)
+
+    def test_public_methods_excludes_private_and_static_methods(self):
+        methods = public_methods(self.store_manager)
+        self.assertIn("process_order", methods)
+        self.assertNotIn("_check_product_found", methods)
+        self.assertNotIn("default_order_check_pipeline", methods)
+
+    def test_dump_contains_stats_for_sampled_methods(self):
+        self.profiler.attach(self.store_manager)
+        self.assertEqual(self.store_manager.apply_discount("P1", 50), 5.0)
+        self.store_manager.apply_discount("P1", 10)
+
+        with open(self.profiler.dump(), encoding="utf-8") as dump_file:
+            report = json.load(dump_file)
+
+        stats = report["methods"]["apply_discount"]
+        self.assertEqual(stats["samples"], 2)
+        self.assertGreaterEqual(stats["alloc_peak_bytes_mean"], 0)
+        self.assertTrue(any("apply_discount" in row["function"] for row in stats["top_functions"]))
+
+    def test_calls_are_not_sampled_outside_sample_rate(self):
+        profiler = CallProfiler(self.temp_dir.name, sample_rate=0.5, dump_every=0, rng=lambda: 0.9)
+        profiler.attach(self.store_manager)
+        self.addCleanup(profiler.detach)
+        self.store_manager.apply_discount("P1", 10)
+
+        with open(profiler.dump(), encoding="utf-8") as dump_file:
+            self.assertEqual(json.load(dump_file)["methods"], {})
+
+    def test_dump_every_writes_files_automatically_and_rotates(self):
+        profiler = CallProfiler(self.temp_dir.name, sample_rate=1.0, dump_every=1, max_dumps=2)
+        profiler.attach(self.store_manager)
+        self.addCleanup(profiler.detach)
+        for _ in range(4):
+            self.store_manager.apply_discount("P1", 10)
+
+        self.assertEqual(len(os.listdir(self.temp_dir.name)), 2)
+
+    def test_tracemalloc_runs_only_during_sampled_calls(self):
+        traced = []
+        self.store_manager.product_db.get_product_details.side_effect = (
+            lambda product_id: traced.append(tracemalloc.is_tracing()) or {"price": 10.0})
+        profiler = CallProfiler(self.temp_dir.name, sample_rate=0.5, dump_every=0, rng=iter([0.9, 0.1]).__next__)
+        profiler.attach(self.store_manager)
+        self.addCleanup(profiler.detach)
+        self.assertFalse(tracemalloc.is_tracing())
+
+        self.store_manager.apply_discount("P1", 10)
+        self.store_manager.apply_discount("P1", 10)
+
+        self.assertEqual(traced, [False, True])
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_detach_restores_original_methods(self):
+        self.profiler.attach(self.store_manager)
+        self.profiler.detach()
+        self.assertNotIn("apply_discount", vars(self.store_manager))
+
+    def test_detach_with_traffic_recorder_in_any_order(self):
+        for profiler_first in (True, False):
+            store_manager = OnlineStoreManager(*[MagicMock() for _ in range(17)])
+            store_manager.product_db.get_product_details.return_value = {"price": 10.0}
+            profiler = CallProfiler(self.temp_dir.name, sample_rate=1.0, dump_every=0)
+            output = io.StringIO()
+            recorder = TrafficRecorder(output, salt="test")
+            recorder.attach(store_manager)
+            profiler.attach(store_manager)
+
+            for tool in ((profiler, recorder) if profiler_first else (recorder, profiler)):
+                tool.detach()
+            self.assertNotIn("apply_discount", vars(store_manager))
+            self.assertEqual(store_manager.apply_discount("P1", 50), 5.0)
+            self.assertEqual(output.getvalue(), "")
+
+    def test_diff_dumps_and_find_regressions(self):
+        old_path = os.path.join(self.temp_dir.name, "old.json")
+        new_path = os.path.join(self.temp_dir.name, "new.json")
+        metrics = {"wall_time_mean": 1.0, "alloc_net_bytes_mean": 100, "alloc_peak_bytes_mean": 1000}
+        self._write_dump(old_path, {"process_order": metrics, "apply_discount": metrics})
+        self._write_dump(new_path, {"process_order": dict(metrics, alloc_peak_bytes_mean=1500),
+                                    "apply_discount": metrics})
+
+        diff = diff_dumps(old_path, new_path)
+
+        self.assertEqual(diff["process_order"]["alloc_peak_bytes_mean"], {"old": 1000, "new": 1500, "change": 0.5})
+        self.assertEqual(find_regressions(diff), ["process_order"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
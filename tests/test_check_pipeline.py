@@ -0,0 +1,99 @@
+import unittest
+from unittest.mock import MagicMock
+
+from src.check_pipeline import CheckPipeline, CheckStage
+
+
+class TestCheckPipeline(unittest.TestCase):
+
+    def setUp(self):
+        """Configura tre controlli simulati che di default vengono superati."""
+        self.cheap = MagicMock(return_value=None)
+        self.medium = MagicMock(return_value=None)
+        self.expensive = MagicMock(return_value=None)
+
+    def _pipeline(self, adaptive=True):
+        return CheckPipeline([
+            CheckStage("expensive", self.expensive, cost=50),
+            CheckStage("medium", self.medium, cost=5, depends_on=("cheap",)),
+            CheckStage("cheap", self.cheap, cost=1),
+        ], adaptive=adaptive)
+
+    def test_stage_raises_error_for_non_positive_cost(self):
+        with self.assertRaises(ValueError):
+            CheckStage("free", self.cheap, cost=0)
+
+    def test_pipeline_raises_error_for_unknown_dependency(self):
+        with self.assertRaises(ValueError):
+            CheckPipeline([CheckStage("a", self.cheap, depends_on=("missing",))])
+
+    def test_pipeline_raises_error_for_cyclic_dependencies(self):
+        with self.assertRaises(ValueError):
+            CheckPipeline([CheckStage("a", self.cheap, depends_on=("b",)),
+                           CheckStage("b", self.medium, depends_on=("a",))])
+
+    def test_execution_order_is_cheapest_first(self):
+        self.assertEqual(self._pipeline().execution_order(), ["cheap", "medium", "expensive"])
+
+    def test_dependencies_are_respected(self):
+        pipeline = CheckPipeline([CheckStage("needs_setup", self.cheap, cost=1, depends_on=("setup",)),
+                                  CheckStage("setup", self.medium, cost=10)])
+        self.assertEqual(pipeline.execution_order(), ["setup", "needs_setup"])
+
+    def test_run_passes_arguments_and_stops_at_first_failure(self):
+        self.medium.return_value = {"status": "error", "message": "fallito"}
+        pipeline = self._pipeline()
+
+        self.assertEqual(pipeline.run("store", {"id": 1}), {"status": "error", "message": "fallito"})
+        self.cheap.assert_called_once_with("store", {"id": 1})
+        self.expensive.assert_not_called()
+
+    def test_run_returns_none_when_all_checks_pass(self):
+        self.assertIsNone(self._pipeline().run())
+        self.expensive.assert_called_once()
+
+    def test_adaptive_order_moves_selective_stage_first(self):
+        """Un controllo costoso che rifiuta quasi sempre passa davanti a uno economico che non rifiuta mai."""
+        self.expensive.return_value = {"status": "error"}
+        pipeline = CheckPipeline([CheckStage("cheap", self.cheap, cost=1),
+                                  CheckStage("expensive", self.expensive, cost=3)])
+        for _ in range(20):
+            pipeline.run()
+
+        self.assertEqual(pipeline.execution_order(), ["expensive", "cheap"])
+        self.assertEqual(pipeline.stats()["expensive"]["rejections"], 20)
+
+    def test_rejection_rate_floor_keeps_cheap_stage_ahead(self):
+        """Un controllo economico che non rifiuta mai resta davanti a uno costoso che rifiuta l'1% delle volte."""
+        pipeline = CheckPipeline([CheckStage("expensive", self.expensive, cost=50),
+                                  CheckStage("cheap", self.cheap, cost=1)])
+        for i in range(5000):
+            self.expensive.return_value = {"status": "error"} if i % 100 == 0 else None
+            pipeline.run()
+
+        self.assertEqual(pipeline.execution_order(), ["cheap", "expensive"])
+
+    def test_rejection_rate_follows_recent_traffic(self):
+        pipeline = CheckPipeline([CheckStage("cheap", self.cheap, cost=1),
+                                  CheckStage("medium", self.medium, cost=5)])
+        for _ in range(20000):
+            pipeline.run()
+        self.assertEqual(pipeline.execution_order(), ["cheap", "medium"])
+
+        self.medium.return_value = {"status": "error"}
+        for _ in range(100):
+            pipeline.run()
+        self.assertEqual(pipeline.execution_order(), ["medium", "cheap"])
+
+    def test_non_adaptive_order_ignores_statistics(self):
+        self.expensive.return_value = {"status": "error"}
+        pipeline = CheckPipeline([CheckStage("cheap", self.cheap, cost=1),
+                                  CheckStage("expensive", self.expensive, cost=3)], adaptive=False)
+        for _ in range(20):
+            pipeline.run()
+
+        self.assertEqual(pipeline.execution_order(), ["cheap", "expensive"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,119 @@
+import unittest
+from unittest.mock import MagicMock
+
+from src.customer_update_batcher import CustomerUpdateBatcher
+from src.external_dependencies import CRMSystem, LoyaltyProgramManager, AuditLogger
+
+
+class TestCustomerUpdateBatcher(unittest.TestCase):
+
+    def setUp(self):
+        """Configura un batcher con un orologio controllabile."""
+        self.mock_crm_system = MagicMock(spec=CRMSystem)
+        self.mock_loyalty_manager = MagicMock(spec=LoyaltyProgramManager)
+        self.mock_audit_logger = MagicMock(spec=AuditLogger)
+        self.now = 0.0
+        self.batcher = CustomerUpdateBatcher(self.mock_crm_system, self.mock_loyalty_manager, self.mock_audit_logger,
+                                             max_batch_size=3, flush_interval=10, clock=lambda: self.now)
+
+    def test_init_raises_error_if_dependency_is_missing(self):
+        with self.assertRaises(ValueError):
+            CustomerUpdateBatcher(self.mock_crm_system, None)
+
+    def test_add_does_not_write_before_batch_is_full(self):
+        self.batcher.add("CUST001", "T1", 10.0)
+        self.batcher.add("CUST001", "T2", 20.0)
+        self.assertEqual(self.batcher.pending_count(), 2)
+        self.mock_crm_system.bulk_update_customer_history.assert_not_called()
+        self.mock_loyalty_manager.award_points_batch.assert_not_called()
+
+    def test_add_flushes_when_batch_is_full_and_merges_points_per_customer(self):
+        self.batcher.add("CUST001", "T1", 10.0)
+        self.batcher.add("CUST002", "T2", 5.0)
+        self.batcher.add("CUST001", "T3", 20.0)
+
+        self.mock_crm_system.bulk_update_customer_history.assert_called_once_with([
+            {"customer_id": "CUST001", "transaction_id": "T1", "amount": 10.0},
+            {"customer_id": "CUST002", "transaction_id": "T2", "amount": 5.0},
+            {"customer_id": "CUST001", "transaction_id": "T3", "amount": 20.0},
+        ])
+        self.mock_loyalty_manager.award_points_batch.assert_called_once_with([
+            {"customer_id": "CUST001", "points": 30, "transaction_ids": ["T1", "T3"]},
+            {"customer_id": "CUST002", "points": 5, "transaction_ids": ["T2"]},
+        ])
+        self.assertEqual(self.batcher.pending_count(), 0)
+
+    def test_points_are_computed_per_order_before_merging(self):
+        """Due ordini da 10.50 valgono 20 punti, come con due chiamate ad award_points."""
+        self.batcher.add("CUST001", "T1", 10.50)
+        self.batcher.add("CUST001", "T2", 10.50)
+        self.batcher.flush()
+
+        self.mock_loyalty_manager.award_points_batch.assert_called_once_with([
+            {"customer_id": "CUST001", "points": 20, "transaction_ids": ["T1", "T2"]}])
+
+    def test_add_logs_flush_failure_and_keeps_entries_queued(self):
+        self.mock_crm_system.bulk_update_customer_history.side_effect = ConnectionError("CRM non raggiungibile")
+        self.batcher.add("CUST001", "T1", 10.0)
+        self.batcher.add("CUST001", "T2", 10.0)
+        self.assertTrue(self.batcher.add("CUST002", "T3", 10.0))
+
+        self.mock_audit_logger.log_event.assert_called_once_with(
+            "CUSTOMER_UPDATE_FLUSH_FAILED", {"error": "CRM non raggiungibile"})
+        self.assertEqual(self.batcher.pending_count(), 3)
+
+        self.mock_crm_system.bulk_update_customer_history.side_effect = None
+        self.batcher.flush()
+        self.assertEqual(len(self.mock_crm_system.bulk_update_customer_history.call_args.args[0]), 3)
+        self.mock_loyalty_manager.award_points_batch.assert_called_once()
+
+    def test_stop_flushes_queued_entries_from_background_thread(self):
+        self.batcher.start()
+        self.batcher.add("CUST001", "T1", 10.0)
+        self.batcher.stop(timeout=1)
+
+        self.mock_crm_system.bulk_update_customer_history.assert_called_once()
+        self.assertEqual(self.batcher.pending_count(), 0)
+
+    def test_add_flushes_after_interval(self):
+        self.batcher.add("CUST001", "T1", 10.0)
+        self.now += 11
+        self.batcher.add("CUST001", "T2", 10.0)
+        self.mock_crm_system.bulk_update_customer_history.assert_called_once()
+
+    def test_add_ignores_duplicate_transaction(self):
+        self.assertTrue(self.batcher.add("CUST001", "T1", 10.0))
+        self.assertFalse(self.batcher.add("CUST001", "T1", 10.0))
+        self.batcher.flush()
+
+        self.mock_loyalty_manager.award_points_batch.assert_called_once_with([
+            {"customer_id": "CUST001", "points": 10, "transaction_ids": ["T1"]}])
+
+    def test_add_ignores_duplicate_transaction_after_flush(self):
+        self.batcher.add("CUST001", "T1", 10.0)
+        self.batcher.flush()
+        self.assertFalse(self.batcher.add("CUST001", "T1", 10.0))
+        self.assertEqual(self.batcher.pending_count(), 0)
+
+    def test_flush_retries_only_loyalty_if_it_failed(self):
+        self.batcher.add("CUST001", "T1", 10.0)
+        self.mock_loyalty_manager.award_points_batch.side_effect = ConnectionError("Servizio fedeltà non disponibile")
+        with self.assertRaises(ConnectionError):
+            self.batcher.flush()
+
+        self.mock_loyalty_manager.award_points_batch.side_effect = None
+        self.batcher.flush()
+
+        self.mock_crm_system.bulk_update_customer_history.assert_called_once()
+        self.assertEqual(self.mock_loyalty_manager.award_points_batch.call_count, 2)
+
+    def test_dedup_window_forgets_oldest_transactions(self):
+        batcher = CustomerUpdateBatcher(self.mock_crm_system, self.mock_loyalty_manager, dedup_window=2)
+        batcher.add("CUST001", "T1", 1.0)
+        batcher.add("CUST001", "T2", 1.0)
+        batcher.add("CUST001", "T3", 1.0)
+        self.assertTrue(batcher.add("CUST001", "T1", 1.0))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,78 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.download_link_signer import DownloadLinkSigner
+
+
+class TestDownloadLinkSigner(unittest.TestCase):
+
+    def setUp(self):
+        """Configura un firmatario con un orologio controllabile."""
+        self.now = 1_000_000
+        self.signer = DownloadLinkSigner("test-secret", ttl_seconds=100, clock=lambda: self.now)
+
+    def test_init_raises_error_without_secret(self):
+        with self.assertRaises(ValueError):
+            DownloadLinkSigner("")
+
+    def test_generated_link_is_valid(self):
+        url = self.signer.generate_download_link("D200", "CUST001")
+
+        self.assertTrue(url.startswith("https://my.store/download/D200?"))
+        self.assertEqual(self.signer.validate(url),
+                         {"status": "success", "product_id": "D200", "customer_id": "CUST001"})
+
+    def test_link_is_reused_while_still_fresh(self):
+        first = self.signer.generate_download_link("D200", "CUST001")
+        self.now += 50
+        self.assertEqual(self.signer.generate_download_link("D200", "CUST001"), first)
+
+    def test_link_is_regenerated_near_expiry(self):
+        first = self.signer.generate_download_link("D200", "CUST001")
+        self.now += 95
+        self.assertNotEqual(self.signer.generate_download_link("D200", "CUST001"), first)
+
+    def test_validate_rejects_expired_link(self):
+        url = self.signer.generate_download_link("D200", "CUST001")
+        self.now += 101
+        self.assertEqual(self.signer.validate(url)["message"], "Link di download scaduto.")
+
+    def test_validate_rejects_tampered_link(self):
+        url = self.signer.generate_download_link("D200", "CUST001")
+        tampered = url.replace("CUST001", "CUST002")
+        self.assertEqual(self.signer.validate(tampered)["status"], "error")
+
+    def test_validate_rejects_link_signed_with_other_key(self):
+        other = DownloadLinkSigner("other-secret", clock=lambda: self.now)
+        url = other.generate_download_link("D200", "CUST001")
+        self.assertEqual(self.signer.validate(url)["status"], "error")
+
+    def test_validate_rejects_malformed_link(self):
+        self.assertEqual(self.signer.validate("https://my.store/download/D200")["status"], "error")
+        url = self.signer.generate_download_link("D200", "CUST001")
+        non_ascii = url.split("&signature=")[0] + "&signature=%C3%A9"
+        self.assertEqual(self.signer.validate(non_ascii),
+                         {"status": "error", "message": "Link di download non valido."})
+
+    def test_cache_evicts_least_recently_used_link(self):
+        signer = DownloadLinkSigner("test-secret", max_cached_links=1, clock=lambda: self.now)
+        first = signer.generate_download_link("D1", "CUST001")
+        signer.generate_download_link("D2", "CUST001")
+        self.now += 1
+        self.assertNotEqual(signer.generate_download_link("D1", "CUST001"), first)
+
+    def test_concurrent_generation_with_small_cache(self):
+        signer = DownloadLinkSigner("test-secret", max_cached_links=4)
+
+        def generate(i):
+            url = signer.generate_download_link(f"D{i % 16}", "CUST001")
+            return signer.validate(url)["status"]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            statuses = list(executor.map(generate, range(5000)))
+        self.assertEqual(set(statuses), {"success"})
+        self.assertLessEqual(len(signer._cache), 4)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
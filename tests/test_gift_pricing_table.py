@@ -0,0 +1,84 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from src.gift_pricing_table import GiftPricingTable, canonical_key
+from src.external_dependencies import GiftOptionsService, AuditLogger
+
+
+class TestGiftPricingTable(unittest.TestCase):
+
+    def setUp(self):
+        """Configura una tabella su un catalogo simulato."""
+        self.mock_gift_options = MagicMock(spec=GiftOptionsService)
+        self.mock_gift_options.get_gift_price_table.return_value = [
+            {"options": {"wrap": True}, "price": 5.0},
+            {"options": {"wrap": True, "card": "auguri"}, "price": 7.5},
+        ]
+        self.mock_audit_logger = MagicMock(spec=AuditLogger)
+        self.table = GiftPricingTable(self.mock_gift_options, self.mock_audit_logger)
+        self.table.refresh()
+
+    def test_init_raises_error_without_service(self):
+        with self.assertRaises(ValueError):
+            GiftPricingTable(None)
+
+    def test_canonical_key_ignores_key_order(self):
+        self.assertEqual(canonical_key({"wrap": True, "card": "x"}), canonical_key({"card": "x", "wrap": True}))
+        self.assertNotEqual(canonical_key({"wrap": True}), canonical_key({"wrap": False}))
+
+    def test_get_gift_wrap_price_uses_local_catalog(self):
+        self.assertEqual(self.table.get_gift_wrap_price({"card": "auguri", "wrap": True}), 7.5)
+        self.mock_gift_options.get_gift_wrap_price.assert_not_called()
+
+    def test_get_gift_wrap_price_memoizes_unknown_options(self):
+        self.mock_gift_options.get_gift_wrap_price.return_value = 9.0
+        self.assertEqual(self.table.get_gift_wrap_price({"wrap": True, "ribbon": "gold"}), 9.0)
+        self.assertEqual(self.table.get_gift_wrap_price({"ribbon": "gold", "wrap": True}), 9.0)
+        self.mock_gift_options.get_gift_wrap_price.assert_called_once()
+
+    def test_memoized_prices_are_bounded(self):
+        table = GiftPricingTable(self.mock_gift_options, max_memoized=2)
+        table.refresh()
+        self.mock_gift_options.get_gift_wrap_price.return_value = 9.0
+        for message in ("uno", "due", "tre"):
+            table.get_gift_wrap_price({"wrap": True, "card": message})
+
+        self.assertEqual(len(table._memoized), 2)
+        # La voce meno recente è stata scartata e viene richiesta di nuovo
+        table.get_gift_wrap_price({"wrap": True, "card": "uno"})
+        self.assertEqual(self.mock_gift_options.get_gift_wrap_price.call_count, 4)
+        # Il catalogo non viene toccato dal limite della cache
+        self.assertEqual(table.get_gift_wrap_price({"wrap": True}), 5.0)
+
+    def test_background_refresh_failure_is_logged(self):
+        table = GiftPricingTable(self.mock_gift_options, self.mock_audit_logger, refresh_interval=0.01)
+        table.start()
+        self.mock_gift_options.get_gift_price_table.side_effect = ConnectionError("Servizio regali non disponibile")
+        for _ in range(100):
+            if self.mock_audit_logger.log_event.called:
+                break
+            time.sleep(0.01)
+        table.stop(timeout=1)
+
+        self.mock_audit_logger.log_event.assert_any_call(
+            "GIFT_PRICING_REFRESH_FAILED", {"error": "Servizio regali non disponibile"})
+        self.assertEqual(table.get_gift_wrap_price({"wrap": True}), 5.0)
+
+    def test_quote_returns_prices_in_order(self):
+        self.assertEqual(self.table.quote([{"wrap": True}, {"wrap": True, "card": "auguri"}]), [5.0, 7.5])
+
+    def test_refresh_replaces_catalog(self):
+        self.mock_gift_options.get_gift_price_table.return_value = [{"options": {"wrap": True}, "price": 6.0}]
+        self.table.refresh()
+        self.assertEqual(self.table.get_gift_wrap_price({"wrap": True}), 6.0)
+
+    def test_start_loads_catalog_and_stop_ends_refresh(self):
+        table = GiftPricingTable(self.mock_gift_options, refresh_interval=60)
+        table.start()
+        table.stop(timeout=1)
+        self.assertEqual(table.get_gift_wrap_price({"wrap": True}), 5.0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,70 @@
+import io
+import unittest
+
+from src.load_generator import FakeService, LoadGenerator, build_fake_store_manager, load_trace
+from src.traffic_recorder import TrafficRecorder
+
+
+class TestLoadGenerator(unittest.TestCase):
+
+    def setUp(self):
+        """Registra una breve traccia su un gestore con servizi finti senza latenza."""
+        self.store_manager = build_fake_store_manager()
+        output = io.StringIO()
+        recorder = TrafficRecorder(output, salt="test")
+        recorder.attach(self.store_manager)
+        customer_info = {"id": "CUST001", "email": "test@example.com", "address": "123 Via Prova"}
+        self.store_manager.process_order("P1", 2, "card", customer_info)
+        self.store_manager.process_digital_order("D1", "card", customer_info)
+        self.store_manager.get_product_price_in_currency("P1", "USD")
+        recorder.detach()
+        output.seek(0)
+        self.trace = load_trace(output)
+
+    def test_fake_service_returns_configured_responses(self):
+        service = FakeService(responses={"get_rate": 1.5, "calculate_tax": lambda amount, address: amount / 10})
+        self.assertEqual(service.get_rate("EUR", "USD"), 1.5)
+        self.assertEqual(service.calculate_tax(100, "x"), 10)
+        self.assertIsNone(service.anything_else())
+
+    def test_fake_store_manager_completes_orders(self):
+        result = self.store_manager.process_order("P1", 1, "card", {"id": "C", "email": "e", "address": "a"})
+        self.assertEqual(result["status"], "success")
+
+    def test_load_trace_reads_recorded_calls(self):
+        self.assertEqual([event["method"] for event in self.trace],
+                         ["process_order", "process_digital_order", "get_product_price_in_currency"])
+
+    def test_init_raises_error_for_empty_trace(self):
+        with self.assertRaises(ValueError):
+            LoadGenerator(self.store_manager, [])
+
+    def test_replay_executes_every_call(self):
+        result = LoadGenerator(self.store_manager, self.trace).replay(speed=10)
+        self.assertEqual(result["requests"], 3)
+        self.assertEqual(result["errors"], 0)
+
+    def test_replay_counts_error_results(self):
+        store_manager = build_fake_store_manager(responses={})
+        result = LoadGenerator(store_manager, self.trace).replay(speed=10)
+        self.assertEqual(result["errors"], 2)
+
+    def test_run_open_loop_repeats_trace(self):
+        result = LoadGenerator(self.store_manager, self.trace).run_open_loop(qps=1000, requests=20)
+        self.assertEqual(result["requests"], 20)
+        self.assertEqual(result["offered_qps"], 1000)
+        self.assertLessEqual(result["latency_p50"], result["latency_p99"])
+
+    def test_sweep_reports_curve_and_saturation(self):
+        store_manager = build_fake_store_manager(latency={"payment_gw": 0.01})
+        generator = LoadGenerator(store_manager, self.trace, workers=1)
+
+        report = generator.sweep([50, 5000], requests=20)
+
+        self.assertEqual([point["offered_qps"] for point in report["curve"]], [50, 5000])
+        self.assertGreater(report["saturation_throughput"], 0)
+        self.assertLess(report["curve"][1]["throughput"], 5000)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,57 @@
+import unittest
+
+from src.method_wrapping import wrap_methods, unwrap_methods
+
+
+class Target:
+
+    def greet(self, name):
+        return f"ciao {name}"
+
+
+def tagging(tag, calls):
+    """Restituisce una fabbrica di wrapper che registra `tag` a ogni chiamata."""
+    def make_wrapper(name, method):
+        def wrapped(*args, **kwargs):
+            calls.append(tag)
+            return method(*args, **kwargs)
+        return wrapped
+    return make_wrapper
+
+
+class TestMethodWrapping(unittest.TestCase):
+
+    def setUp(self):
+        self.target = Target()
+        self.calls = []
+
+    def test_wrap_and_unwrap_restores_class_method(self):
+        layers = wrap_methods(self.target, ["greet"], tagging("a", self.calls))
+        self.assertEqual(self.target.greet("Anna"), "ciao Anna")
+        self.assertEqual(self.calls, ["a"])
+
+        unwrap_methods(self.target, layers)
+        self.assertNotIn("greet", vars(self.target))
+
+    def test_unwrap_inner_layer_keeps_outer_layer(self):
+        inner = wrap_methods(self.target, ["greet"], tagging("inner", self.calls))
+        outer = wrap_methods(self.target, ["greet"], tagging("outer", self.calls))
+
+        unwrap_methods(self.target, inner)
+        self.assertEqual(self.target.greet("Anna"), "ciao Anna")
+        self.assertEqual(self.calls, ["outer"])
+
+        unwrap_methods(self.target, outer)
+        self.assertNotIn("greet", vars(self.target))
+
+    def test_unwrap_restores_previous_instance_attribute(self):
+        def replaced(name):
+            return "sostituito"
+        self.target.greet = replaced
+        layers = wrap_methods(self.target, ["greet"], tagging("a", self.calls))
+        unwrap_methods(self.target, layers)
+        self.assertIs(self.target.greet, replaced)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
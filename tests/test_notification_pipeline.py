@@ -0,0 +1,93 @@
+import unittest
+from unittest.mock import MagicMock
+
+from src.notification_pipeline import NotificationPipeline
+from src.external_dependencies import NotificationService, AuditLogger
+
+
+class TestNotificationPipeline(unittest.TestCase):
+
+    def setUp(self):
+        """Configura una pipeline con servizi simulati."""
+        self.mock_notification_service = MagicMock(spec=NotificationService)
+        self.mock_audit_logger = MagicMock(spec=AuditLogger)
+        self.pipeline = NotificationPipeline(self.mock_notification_service, self.mock_audit_logger,
+                                             max_batch_size=2, flush_interval=0.05)
+
+    def test_init_raises_error_without_service(self):
+        with self.assertRaises(ValueError):
+            NotificationPipeline(None)
+
+    def test_render_compiles_template_once(self):
+        first = self.pipeline.render("order_confirmation", product_id="P1", quantity=2, transaction_id="T1")
+        compiled = self.pipeline._compiled_templates["order_confirmation"]
+        self.pipeline.render("order_confirmation", product_id="P2", quantity=1, transaction_id="T2")
+
+        self.assertIn("T1", first)
+        self.assertIs(self.pipeline._compiled_templates["order_confirmation"], compiled)
+
+    def test_render_raises_error_for_unknown_template(self):
+        with self.assertRaises(KeyError):
+            self.pipeline.render("missing")
+
+    def test_enqueue_does_not_send_synchronously(self):
+        self.pipeline.enqueue("a@example.com", "P1", 1, "T1")
+        self.mock_notification_service.send_bulk.assert_not_called()
+        self.mock_notification_service.send_order_confirmation.assert_not_called()
+
+    def test_enqueue_ignores_duplicate_transaction(self):
+        self.assertTrue(self.pipeline.enqueue("a@example.com", "P1", 1, "T1"))
+        self.assertFalse(self.pipeline.enqueue("a@example.com", "P1", 1, "T1"))
+        self.pipeline.flush()
+
+        sent = self.mock_notification_service.send_bulk.call_args.args[0]
+        self.assertEqual([message["transaction_id"] for message in sent], ["T1"])
+
+    def test_flush_sends_in_batches(self):
+        for i in range(3):
+            self.pipeline.enqueue(f"c{i}@example.com", "P1", 1, f"T{i}")
+        self.pipeline.flush()
+
+        self.assertEqual(self.mock_notification_service.send_bulk.call_count, 2)
+        first_batch = self.mock_notification_service.send_bulk.call_args_list[0].args[0]
+        self.assertEqual([message["to"] for message in first_batch], ["c0@example.com", "c1@example.com"])
+
+    def test_send_failure_is_logged(self):
+        self.mock_notification_service.send_bulk.side_effect = ConnectionError("SMTP server down")
+        self.pipeline.enqueue("a@example.com", "P1", 1, "T1")
+        self.pipeline.flush()
+
+        self.mock_audit_logger.log_event.assert_called_once_with(
+            "NOTIFICATION_FAILED", {"count": 1, "error": "SMTP server down"})
+
+    def test_failed_send_allows_retry_of_transaction(self):
+        self.mock_notification_service.send_bulk.side_effect = ConnectionError("SMTP server down")
+        self.pipeline.enqueue("a@example.com", "P1", 1, "T1")
+        self.pipeline.flush()
+
+        self.mock_notification_service.send_bulk.side_effect = None
+        self.assertTrue(self.pipeline.enqueue("a@example.com", "P1", 1, "T1"))
+        self.pipeline.flush()
+        self.assertFalse(self.pipeline.enqueue("a@example.com", "P1", 1, "T1"))
+
+    def test_render_failure_does_not_mark_transaction(self):
+        pipeline = NotificationPipeline(self.mock_notification_service,
+                                        templates={"order_confirmation": "Ordine $transaction_id per $name"})
+        with self.assertRaises(KeyError):
+            pipeline.enqueue("a@example.com", "P1", 1, "T1")
+
+        pipeline.templates = {"order_confirmation": "Ordine $transaction_id"}
+        pipeline._compiled_templates = {}
+        self.assertTrue(pipeline.enqueue("a@example.com", "P1", 1, "T1"))
+
+    def test_worker_thread_sends_queued_messages(self):
+        self.pipeline.start()
+        self.pipeline.enqueue("a@example.com", "P1", 1, "T1")
+        self.pipeline.stop(timeout=1)
+
+        self.mock_notification_service.send_bulk.assert_called_once()
+        self.assertEqual(self.mock_notification_service.send_bulk.call_args.args[0][0]["to"], "a@example.com")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
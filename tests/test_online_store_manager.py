@@ -2,6 +2,15 @@ import unittest
 from unittest.mock import MagicMock, patch, call
 
 from src.online_store_manager import OnlineStoreManager
+from src.analytics_aggregator import SalesAggregator
+from src.customer_update_batcher import CustomerUpdateBatcher
+from src.notification_pipeline import NotificationPipeline
+from src.shipment_consolidator import ShipmentConsolidator
+from src.download_link_signer import DownloadLinkSigner
+from src.rma_ticket_allocator import RMATicketAllocator
+from src.gift_pricing_table import GiftPricingTable
+from src.admission_controller import AdmissionController, PRIORITY_ORDER, PRIORITY_REFUND
+from src.price_view import PriceView
 # Assumiamo che le classi di dipendenza siano in external_dependencies.py
 from src.external_dependencies import (ProductDatabase, InventorySystem, PaymentGateway, PromoCodeValidator,
                                        NotificationService, ShippingService, AuditLogger, FraudDetectionService,
@@ -532,5 +541,234 @@ class TestOnlineStoreManager(unittest.TestCase):
 
         self.mock_crm_system.update_customer_history.assert_called_once()
 
+    def test_process_order_records_sale_in_aggregator_instead_of_tracker(self):
+        """Verifica che, con un aggregatore configurato, la vendita non venga inviata subito all'analytics."""
+        self._setup_successful_order_mocks()
+        mock_aggregator = MagicMock(spec=SalesAggregator)
+        self.store_manager.sales_aggregator = mock_aggregator
+
+        self.store_manager.process_order("P123", 1, self.card_details, self.customer_info)
+
+        mock_aggregator.record_sale.assert_called_once_with("P123", 1, 122.0)
+        self.mock_analytics_tracker.track_sale.assert_not_called()
+
+    def test_process_order_queues_customer_updates_in_batcher(self):
+        """Verifica che, con un batcher configurato, CRM e fedeltà non vengano chiamati per singolo ordine."""
+        self._setup_successful_order_mocks()
+        mock_batcher = MagicMock(spec=CustomerUpdateBatcher)
+        self.store_manager.customer_update_batcher = mock_batcher
+
+        self.store_manager.process_order("P123", 1, self.card_details, self.customer_info)
+
+        mock_batcher.add.assert_called_once_with("CUST001", "TXYZ", 122.0)
+        self.mock_crm_system.update_customer_history.assert_not_called()
+        self.mock_loyalty_manager.award_points.assert_not_called()
+
+    def test_process_order_enqueues_notification_in_pipeline(self):
+        """Verifica che, con una pipeline configurata, la conferma venga accodata e non inviata subito."""
+        self._setup_successful_order_mocks()
+        mock_pipeline = MagicMock(spec=NotificationPipeline)
+        self.store_manager.notification_pipeline = mock_pipeline
+
+        self.store_manager.process_order("P123", 2, self.card_details, self.customer_info)
+
+        mock_pipeline.enqueue.assert_called_once_with(self.customer_info["email"], "P123", 2, "TXYZ")
+        self.mock_notification_service.send_order_confirmation.assert_not_called()
+
+    def test_process_order_adds_shipment_to_consolidator(self):
+        """Verifica che, con un consolidatore configurato, la spedizione non venga pianificata subito."""
+        self._setup_successful_order_mocks()
+        mock_consolidator = MagicMock(spec=ShipmentConsolidator)
+        self.store_manager.shipment_consolidator = mock_consolidator
+
+        self.store_manager.process_order("P123", 2, self.card_details, self.customer_info)
+
+        mock_consolidator.add.assert_called_once_with("P123", 2, self.customer_info["address"])
+        self.mock_shipping_service.schedule_shipment.assert_not_called()
+
+    def test_process_order_succeeds_if_consolidated_shipment_submission_fails(self):
+        """Verifica che un errore del corriere durante il consolidamento non faccia fallire un ordine già pagato."""
+        self._setup_successful_order_mocks()
+        self.mock_shipping_service.schedule_bulk_shipments.side_effect = ConnectionError("Corriere non raggiungibile")
+        consolidator = ShipmentConsolidator(self.mock_shipping_service, self.mock_audit_logger, window_seconds=1e-9)
+        self.store_manager.shipment_consolidator = consolidator
+
+        result = self.store_manager.process_order("P123", 2, self.card_details, self.customer_info)
+
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(consolidator.pending_count(), 1)
+        self.mock_audit_logger.log_event.assert_any_call(
+            "SHIPMENT_SUBMISSION_FAILED", {"error": "Corriere non raggiungibile"})
+
+    def test_process_digital_order_uses_local_signer_if_configured(self):
+        """Verifica che, con un firmatario locale, il link non venga richiesto al servizio remoto."""
+        self.mock_product_db.get_product_details.return_value = {"price": 20.0, "is_digital": True}
+        self.mock_payment_gw.process_payment.return_value = {"status": "success"}
+        mock_signer = MagicMock(spec=DownloadLinkSigner)
+        mock_signer.generate_download_link.return_value = "https://my.store/download/D200?signature=abc"
+        self.store_manager.download_link_signer = mock_signer
+
+        result = self.store_manager.process_digital_order("D200", self.card_details, self.customer_info)
+
+        self.assertEqual(result["download_link"], "https://my.store/download/D200?signature=abc")
+        mock_signer.generate_download_link.assert_called_once_with("D200", "CUST001")
+        self.mock_digital_manager.generate_download_link.assert_not_called()
+
+    def test_request_return_uses_allocator_if_configured(self):
+        """Verifica che, con un allocatore, l'ID del ticket venga assegnato localmente."""
+        self.mock_product_db.get_product_details.return_value = {"is_returnable": True}
+        mock_allocator = MagicMock(spec=RMATicketAllocator)
+        mock_allocator.allocate.return_value = ["RMA-10000"]
+        self.store_manager.rma_ticket_allocator = mock_allocator
+
+        result = self.store_manager.request_return("P123", "TXYZ")
+
+        self.assertEqual(result, {"status": "success", "rma_ticket": "RMA-10000"})
+        self.mock_rma_manager.create_rma_tickets.assert_called_once_with(
+            [{"ticket_id": "RMA-10000", "product_id": "P123", "transaction_id": "TXYZ"}])
+        self.mock_rma_manager.create_rma_ticket.assert_not_called()
+
+    def test_request_returns_reads_products_once_and_creates_tickets_in_bulk(self):
+        """Verifica che le richieste di reso multiple usino una sola lettura e una sola creazione."""
+        self.mock_product_db.get_products_details.return_value = {
+            "P1": {"is_returnable": True}, "P2": {"is_returnable": False}}
+        mock_allocator = MagicMock(spec=RMATicketAllocator)
+        mock_allocator.allocate.return_value = ["RMA-1", "RMA-2"]
+        self.store_manager.rma_ticket_allocator = mock_allocator
+
+        results = self.store_manager.request_returns([("P1", "T1"), ("P2", "T2"), ("P3", "T3"), ("P1", "T4")])
+
+        self.mock_product_db.get_products_details.assert_called_once_with(["P1", "P2", "P3"])
+        self.assertEqual(results, [
+            {"status": "success", "rma_ticket": "RMA-1"},
+            {"status": "error", "message": "Questo prodotto non può essere restituito."},
+            {"status": "error", "message": "Prodotto non trovato."},
+            {"status": "success", "rma_ticket": "RMA-2"},
+        ])
+        self.mock_rma_manager.create_rma_tickets.assert_called_once_with([
+            {"ticket_id": "RMA-1", "product_id": "P1", "transaction_id": "T1"},
+            {"ticket_id": "RMA-2", "product_id": "P1", "transaction_id": "T4"},
+        ])
+
+    def test_request_returns_with_empty_list(self):
+        self.assertEqual(self.store_manager.request_returns([]), [])
+        self.mock_product_db.get_products_details.assert_not_called()
+
+    def test_process_order_uses_local_gift_pricing_table(self):
+        """Verifica che, con una tabella prezzi locale, il servizio regalo non venga interrogato."""
+        self._setup_successful_order_mocks()
+        mock_pricing_table = MagicMock(spec=GiftPricingTable)
+        mock_pricing_table.get_gift_wrap_price.return_value = 5.00
+        self.store_manager.gift_pricing_table = mock_pricing_table
+
+        self.store_manager.process_order("P123", 1, self.card_details, self.customer_info, gift_options={"wrap": True})
+
+        mock_pricing_table.get_gift_wrap_price.assert_called_once_with({"wrap": True})
+        self.mock_gift_options.get_gift_wrap_price.assert_not_called()
+        self.mock_payment_gw.process_payment.assert_called_once_with(127.0, self.card_details)
+
+    def test_process_order_with_check_pipeline_skips_fraud_if_stock_unavailable(self):
+        """Verifica che, con la pipeline dei controlli, un ordine senza stock non paghi l'analisi anti-frode."""
+        self._setup_successful_order_mocks()
+        self.mock_product_db.check_product_availability.return_value = False
+        self.store_manager.order_check_pipeline = OnlineStoreManager.default_order_check_pipeline()
+
+        result = self.store_manager.process_order("P123", 1, self.card_details, self.customer_info)
+
+        self.assertEqual(result["message"], "Quantità non disponibile.")
+        self.mock_fraud_detector.is_fraudulent.assert_not_called()
+        self.mock_compliance_checker.verify_shipment.assert_not_called()
+
+    def test_default_check_pipeline_keeps_fraud_after_product_checks(self):
+        """Verifica che l'analisi anti-frode non passi davanti ai controlli sul prodotto, anche se non rifiutano mai."""
+        pipeline = OnlineStoreManager.default_order_check_pipeline()
+        for stage in pipeline.stages:
+            for _ in range(1000):
+                stage.record(stage.name == "not_fraudulent", pipeline.decay)
+
+        order = pipeline.execution_order()
+        for name in ("product_found", "stock_available", "valid_price"):
+            self.assertLess(order.index(name), order.index("not_fraudulent"))
+
+    def test_process_order_with_check_pipeline_success(self):
+        self._setup_successful_order_mocks()
+        self.store_manager.order_check_pipeline = OnlineStoreManager.default_order_check_pipeline()
+
+        result = self.store_manager.process_order("P123", 1, self.card_details, self.customer_info)
+
+        self.assertEqual(result["status"], "success")
+        self.mock_fraud_detector.is_fraudulent.assert_called_once_with(self.customer_info, self.card_details)
+        self.mock_payment_gw.process_payment.assert_called_once_with(122.0, self.card_details)
+
+    def test_process_order_rejected_by_admission_control(self):
+        """Verifica che un ordine rifiutato per sovraccarico non raggiunga alcun servizio a valle."""
+        mock_admission = MagicMock(spec=AdmissionController)
+        mock_admission.admit.return_value = False
+        self.store_manager.admission_controller = mock_admission
+
+        result = self.store_manager.process_order("P123", 1, self.card_details, self.customer_info)
+
+        self.assertEqual(result["status"], "error")
+        mock_admission.admit.assert_called_once_with(PRIORITY_ORDER, "CUST001")
+        self.mock_product_db.get_product_details.assert_not_called()
+        self.mock_audit_logger.log_event.assert_called_once_with(
+            "REQUEST_REJECTED", {"reason": "Load shedding", "operation": "process_order"})
+
+    def test_process_refund_uses_refund_priority(self):
+        self.mock_product_db.get_product_details.return_value = {"price": 50}
+        self.mock_payment_gw.process_refund.return_value = {"status": "success"}
+        mock_admission = MagicMock(spec=AdmissionController)
+        mock_admission.admit.return_value = True
+        self.store_manager.admission_controller = mock_admission
+
+        result = self.store_manager.process_refund("P123", 1, "TXYZ")
+
+        self.assertEqual(result["status"], "success")
+        mock_admission.admit.assert_called_once_with(PRIORITY_REFUND, None)
+
+    def test_process_digital_order_rejected_by_admission_control(self):
+        mock_admission = MagicMock(spec=AdmissionController)
+        mock_admission.admit.return_value = False
+        self.store_manager.admission_controller = mock_admission
+
+        result = self.store_manager.process_digital_order("D200", self.card_details, self.customer_info)
+
+        self.assertEqual(result["status"], "error")
+        self.mock_payment_gw.process_payment.assert_not_called()
+
+    def _attach_price_view(self):
+        """Metodo helper che collega una vista prezzi con un prodotto P123 a 100 EUR."""
+        self.mock_product_db.get_products_details.return_value = {"P123": {"price": 100.0}}
+        self.mock_currency_converter.get_rate.return_value = 1.08
+        self.mock_promo_validator.validate_code.return_value = {"is_valid": True, "discount_percentage": 15}
+        price_view = PriceView(self.mock_product_db, self.mock_currency_converter, self.mock_promo_validator,
+                               currencies=("USD",), promo_codes=("WINTER15",))
+        price_view.load(["P123"])
+        self.mock_currency_converter.reset_mock()
+        self.mock_promo_validator.reset_mock()
+        self.store_manager.price_view = price_view
+
+    def test_price_queries_served_from_price_view_without_remote_calls(self):
+        self._attach_price_view()
+
+        self.assertEqual(self.store_manager.apply_discount("P123", 20), 80.0)
+        self.assertEqual(self.store_manager.get_product_price_in_currency("P123", "USD"), 108.0)
+        self.assertEqual(self.store_manager.get_price_with_promo_code("P123", "WINTER15")["new_price"], 85.0)
+
+        self.mock_product_db.get_product_details.assert_not_called()
+        self.mock_currency_converter.get_rate.assert_not_called()
+        self.mock_promo_validator.validate_code.assert_not_called()
+
+    def test_price_queries_fall_back_to_services_on_view_miss(self):
+        self._attach_price_view()
+        self.mock_product_db.get_product_details.return_value = {"price": 50.0}
+        self.mock_currency_converter.get_rate.return_value = 0.85
+
+        self.assertEqual(self.store_manager.get_product_price_in_currency("P999", "USD"), 42.5)
+        self.assertEqual(self.store_manager.get_product_price_in_currency("P123", "GBP"), 42.5)
+        self.store_manager.get_price_with_promo_code("P123", "SUMMER10")
+        self.mock_promo_validator.validate_code.assert_called_once_with("SUMMER10")
+
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
\ No newline at end of file
@@ -0,0 +1,74 @@
+import unittest
+from unittest.mock import MagicMock
+
+from src.price_view import PriceView
+from src.external_dependencies import ProductDatabase, CurrencyConverter, PromoCodeValidator
+
+
+class TestPriceView(unittest.TestCase):
+
+    def setUp(self):
+        """Configura una vista con due prodotti, una valuta e due codici promozionali."""
+        self.mock_product_db = MagicMock(spec=ProductDatabase)
+        self.mock_currency_converter = MagicMock(spec=CurrencyConverter)
+        self.mock_promo_validator = MagicMock(spec=PromoCodeValidator)
+        self.mock_product_db.get_products_details.return_value = {
+            "P1": {"price": 100.0}, "P2": {"price": 99.99}, "P3": None}
+        self.mock_currency_converter.get_rate.return_value = 1.08
+        self.mock_promo_validator.validate_code.side_effect = lambda code: (
+            {"is_valid": True, "discount_percentage": 15} if code == "WINTER15" else {"is_valid": False})
+
+        self.view = PriceView(self.mock_product_db, self.mock_currency_converter, self.mock_promo_validator,
+                              currencies=("usd", "EUR"), promo_codes=("WINTER15", "EXPIRED"))
+        self.view.load(["P1", "P2", "P3"])
+
+    def test_init_raises_error_if_dependency_is_missing(self):
+        with self.assertRaises(ValueError):
+            PriceView(self.mock_product_db, None, self.mock_promo_validator)
+
+    def test_load_calls_each_service_once(self):
+        self.mock_product_db.get_products_details.assert_called_once_with(["P1", "P2", "P3"])
+        self.mock_currency_converter.get_rate.assert_called_once_with("EUR", "USD")
+        self.assertEqual(self.mock_promo_validator.validate_code.call_count, 2)
+
+    def test_lookups_are_precomputed(self):
+        self.assertEqual(self.view.get_base_price("P1"), 100.0)
+        self.assertEqual(self.view.get_price_in_currency("P1", "USD"), 108.0)
+        self.assertEqual(self.view.get_price_in_currency("P2", "eur"), 99.99)
+        self.assertEqual(self.view.get_price_with_promo("P1", "WINTER15"), {"status": "success", "new_price": 85.0})
+        self.assertEqual(self.view.get_price_with_promo("P1", "EXPIRED")["status"], "error")
+
+    def test_lookups_miss_for_unknown_entries(self):
+        self.assertIsNone(self.view.get_base_price("P3"))
+        self.assertIsNone(self.view.get_price_in_currency("P9", "USD"))
+        self.assertIsNone(self.view.get_price_with_promo("P1", "UNKNOWN"))
+        self.assertFalse(self.view.has_currency("GBP"))
+
+    def test_on_product_price_changed_updates_only_that_row(self):
+        self.view.on_product_price_changed("P1", 200.0)
+
+        self.assertEqual(self.view.get_price_in_currency("P1", "USD"), 216.0)
+        self.assertEqual(self.view.get_price_with_promo("P1", "WINTER15")["new_price"], 170.0)
+        self.assertEqual(self.view.get_price_in_currency("P2", "USD"), 107.99)
+
+    def test_on_product_price_changed_with_none_removes_product(self):
+        self.view.on_product_price_changed("P1", None)
+        self.assertIsNone(self.view.get_base_price("P1"))
+
+    def test_on_rate_changed_updates_currency_column(self):
+        self.view.on_rate_changed("USD", 1.1)
+        self.view.on_rate_changed("GBP", 0.85)
+
+        self.assertEqual(self.view.get_price_in_currency("P1", "USD"), 110.0)
+        self.assertEqual(self.view.get_price_in_currency("P1", "GBP"), 85.0)
+
+    def test_on_promo_changed_updates_promo_column(self):
+        self.view.on_promo_changed("EXPIRED", {"is_valid": True, "discount_percentage": 50})
+        self.assertEqual(self.view.get_price_with_promo("P1", "EXPIRED")["new_price"], 50.0)
+
+        self.view.on_promo_changed("WINTER15", {"is_valid": False})
+        self.assertEqual(self.view.get_price_with_promo("P1", "WINTER15")["status"], "error")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,52 @@
+import unittest
+from unittest.mock import MagicMock
+
+from src.rma_ticket_allocator import RMATicketAllocator
+from src.external_dependencies import RMAManager
+
+
+class TestRMATicketAllocator(unittest.TestCase):
+
+    def setUp(self):
+        """Configura un allocatore su un gestore RMA che restituisce blocchi consecutivi."""
+        self.mock_rma_manager = MagicMock(spec=RMAManager)
+        self.mock_rma_manager.reserve_ticket_block.side_effect = [100, 500]
+        self.allocator = RMATicketAllocator(self.mock_rma_manager, block_size=3)
+
+    def test_init_raises_error_without_manager(self):
+        with self.assertRaises(ValueError):
+            RMATicketAllocator(None)
+
+    def test_next_ticket_id_reserves_block_once(self):
+        ids = [self.allocator.next_ticket_id() for _ in range(3)]
+
+        self.assertEqual(ids, ["RMA-100", "RMA-101", "RMA-102"])
+        self.mock_rma_manager.reserve_ticket_block.assert_called_once_with(3)
+
+    def test_next_ticket_id_moves_to_new_block_when_exhausted(self):
+        ids = [self.allocator.next_ticket_id() for _ in range(4)]
+        self.assertEqual(ids[-1], "RMA-500")
+        self.assertEqual(self.mock_rma_manager.reserve_ticket_block.call_count, 2)
+
+    def test_allocate_reserves_large_enough_block(self):
+        ids = self.allocator.allocate(5)
+
+        self.assertEqual(ids, ["RMA-100", "RMA-101", "RMA-102", "RMA-103", "RMA-104"])
+        self.mock_rma_manager.reserve_ticket_block.assert_called_once_with(5)
+
+    def test_allocate_raises_error_for_invalid_count(self):
+        with self.assertRaises(ValueError):
+            self.allocator.allocate(0)
+
+    def test_allocators_never_return_same_id(self):
+        """Due worker che condividono lo stesso gestore non producono ID duplicati."""
+        rma_manager = RMAManager()
+        first = RMATicketAllocator(rma_manager, block_size=10)
+        second = RMATicketAllocator(rma_manager, block_size=10)
+
+        ids = first.allocate(15) + second.allocate(15) + first.allocate(5)
+        self.assertEqual(len(ids), len(set(ids)))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
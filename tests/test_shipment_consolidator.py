@@ -0,0 +1,124 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from src.shipment_consolidator import ShipmentConsolidator, normalize_address
+from src.external_dependencies import ShippingService, AuditLogger
+
+
+class TestShipmentConsolidator(unittest.TestCase):
+
+    def setUp(self):
+        """Configura un consolidatore con un orologio controllabile."""
+        self.mock_shipping_service = MagicMock(spec=ShippingService)
+        self.mock_audit_logger = MagicMock(spec=AuditLogger)
+        self.now = 0.0
+        self.consolidator = ShipmentConsolidator(self.mock_shipping_service, self.mock_audit_logger,
+                                                 window_seconds=60, clock=lambda: self.now)
+
+    def test_init_raises_error_without_service(self):
+        with self.assertRaises(ValueError):
+            ShipmentConsolidator(None)
+
+    def test_normalize_address(self):
+        self.assertEqual(normalize_address("  123, Via  Prova. "), "123 via prova")
+
+    def test_add_merges_lines_for_same_address(self):
+        self.consolidator.add("P1", 1, "123 Via Prova")
+        self.consolidator.add("P2", 2, "123 via prova")
+        self.consolidator.add("P1", 1, "123, Via Prova")
+
+        self.assertEqual(self.consolidator.pending_count(), 1)
+        self.mock_shipping_service.schedule_bulk_shipments.assert_not_called()
+
+        self.consolidator.flush()
+        self.mock_shipping_service.schedule_bulk_shipments.assert_called_once_with([
+            {"address": "123 Via Prova",
+             "items": [{"product_id": "P1", "quantity": 2}, {"product_id": "P2", "quantity": 2}]}])
+
+    def test_add_raises_error_for_invalid_quantity(self):
+        with self.assertRaises(ValueError):
+            self.consolidator.add("P1", 0, "123 Via Prova")
+
+    def test_add_submits_expired_shipments_only(self):
+        self.consolidator.add("P1", 1, "Indirizzo A")
+        self.now += 30
+        self.consolidator.add("P2", 1, "Indirizzo B")
+        self.now += 31
+        self.consolidator.add("P3", 1, "Indirizzo C")
+
+        self.mock_shipping_service.schedule_bulk_shipments.assert_called_once_with([
+            {"address": "Indirizzo A", "items": [{"product_id": "P1", "quantity": 1}]}])
+        self.assertEqual(self.consolidator.pending_count(), 2)
+
+    def test_add_keeps_new_line_pending_if_bulk_call_fails(self):
+        self.consolidator.add("P1", 1, "a")
+        self.now += 61
+        self.mock_shipping_service.schedule_bulk_shipments.side_effect = ConnectionError("Corriere non raggiungibile")
+
+        self.consolidator.add("P2", 1, "b")
+
+        self.assertEqual(self.consolidator.pending_count(), 2)
+        self.mock_audit_logger.log_event.assert_called_once_with(
+            "SHIPMENT_SUBMISSION_FAILED", {"error": "Corriere non raggiungibile"})
+
+        self.mock_shipping_service.schedule_bulk_shipments.side_effect = None
+        shipped = self.consolidator.flush()
+        self.assertEqual([shipment["address"] for shipment in shipped], ["a", "b"])
+
+    def test_failed_submission_is_not_retried_on_every_add(self):
+        self.consolidator.add("P1", 1, "a")
+        self.now += 61
+        self.mock_shipping_service.schedule_bulk_shipments.side_effect = ConnectionError("Corriere non raggiungibile")
+        self.consolidator.add("P2", 1, "b")
+        self.consolidator.add("P3", 1, "c")
+        self.assertEqual(self.mock_shipping_service.schedule_bulk_shipments.call_count, 1)
+
+        self.mock_shipping_service.schedule_bulk_shipments.side_effect = None
+        self.now += 30
+        self.consolidator.add("P4", 1, "a")
+        self.assertEqual(self.mock_shipping_service.schedule_bulk_shipments.call_count, 2)
+        self.mock_shipping_service.schedule_bulk_shipments.assert_called_with([
+            {"address": "a", "items": [{"product_id": "P1", "quantity": 1}, {"product_id": "P4", "quantity": 1}]}])
+        self.assertEqual(self.consolidator.pending_count(), 2)
+
+    def test_carrier_call_is_made_without_holding_the_lock(self):
+        self.consolidator.add("P1", 1, "a")
+        self.mock_shipping_service.schedule_bulk_shipments.side_effect = (
+            lambda shipments: self.consolidator.add("P2", 1, "b"))
+        self.consolidator.flush()
+        self.assertEqual(self.consolidator.pending_count(), 1)
+
+    def test_background_flush_ships_expired_shipments_without_new_orders(self):
+        self.consolidator.add("P1", 1, "Indirizzo A")
+        self.now += 61
+        self.consolidator.start(interval=0.01)
+        for _ in range(100):
+            if self.consolidator.pending_count() == 0:
+                break
+            time.sleep(0.01)
+        self.consolidator.stop(timeout=1)
+
+        self.mock_shipping_service.schedule_bulk_shipments.assert_called_once_with([
+            {"address": "Indirizzo A", "items": [{"product_id": "P1", "quantity": 1}]}])
+
+    def test_stop_ships_all_pending_shipments(self):
+        self.consolidator.start(interval=60)
+        self.consolidator.add("P1", 1, "Indirizzo A")
+        self.consolidator.stop(timeout=1)
+        self.assertEqual(self.consolidator.pending_count(), 0)
+
+    def test_flush_keeps_shipments_if_service_fails(self):
+        self.consolidator.add("P1", 1, "Indirizzo A")
+        self.mock_shipping_service.schedule_bulk_shipments.side_effect = ConnectionError("Corriere non raggiungibile")
+        with self.assertRaises(ConnectionError):
+            self.consolidator.flush()
+        self.assertEqual(self.consolidator.pending_count(), 1)
+
+    def test_flush_with_nothing_pending_does_not_call_service(self):
+        self.assertEqual(self.consolidator.flush(), [])
+        self.mock_shipping_service.schedule_bulk_shipments.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
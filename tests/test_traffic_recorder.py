@@ -0,0 +1,102 @@
+import io
+import json
+import unittest
+from unittest.mock import MagicMock
+
+from src.traffic_recorder import TrafficRecorder, scrub_pii, REDACTED
+from src.online_store_manager import OnlineStoreManager
+
+
+class TestTrafficRecorder(unittest.TestCase):
+
+    def setUp(self):
+        """Configura un registratore su un gestore con dipendenze simulate."""
+        self.store_manager = OnlineStoreManager(*[MagicMock() for _ in range(17)])
+        self.store_manager.product_db.get_product_details.return_value = {"price": 10.0}
+        self.output = io.StringIO()
+        self.recorder = TrafficRecorder(self.output, salt="test")
+        self.customer_info = {"id": "CUST001", "email": "test@example.com", "address": "123 Via Prova"}
+
+    def _events(self):
+        return [json.loads(line) for line in self.output.getvalue().splitlines()]
+
+    def test_scrub_pii_removes_card_and_pseudonymizes_customer(self):
+        scrubbed = scrub_pii({"card_details": "4111", "customer_info": self.customer_info}, salt="test")
+
+        self.assertEqual(scrubbed["card_details"], REDACTED)
+        self.assertNotIn("test@example.com", json.dumps(scrubbed))
+        self.assertNotIn("Via Prova", json.dumps(scrubbed))
+        self.assertEqual(scrubbed, scrub_pii({"card_details": "5500", "customer_info": self.customer_info}, "test"))
+
+    def test_scrub_pii_pseudonymizes_gift_text_and_extra_customer_fields(self):
+        customer_info = dict(self.customer_info, phone="+39 333 1234567", name="Mario Rossi")
+        scrubbed = scrub_pii({"customer_info": customer_info,
+                              "gift_options": {"wrap": True, "msg": "Ciao mamma, Mario Rossi"}}, salt="test")
+
+        self.assertEqual(set(scrubbed["customer_info"]), set(customer_info))
+        self.assertIs(scrubbed["gift_options"]["wrap"], True)
+        trace = json.dumps(scrubbed)
+        for value in customer_info.values():
+            self.assertNotIn(value, trace)
+        self.assertNotIn("Mario Rossi", trace)
+
+    def test_recorded_order_contains_no_customer_or_gift_text(self):
+        self.recorder.attach(self.store_manager)
+        self.store_manager.process_order("P1", 1, "4111-1111", dict(self.customer_info, name="Mario Rossi"),
+                                         {"wrap": True, "msg": "Auguri da Mario Rossi"})
+
+        trace = self.output.getvalue()
+        for secret in ("4111-1111", "CUST001", "test@example.com", "Via Prova", "Mario Rossi", "Auguri"):
+            self.assertNotIn(secret, trace)
+
+    def test_attach_records_calls_by_argument_name(self):
+        self.recorder.attach(self.store_manager)
+        self.store_manager.apply_discount("P1", 10)
+        self.store_manager.process_refund("P1", quantity=2, transaction_id="TXYZ")
+
+        events = self._events()
+        self.assertEqual([event["method"] for event in events], ["apply_discount", "process_refund"])
+        self.assertEqual(events[1]["args"], {"product_id": "P1", "quantity": 2, "transaction_id": "TXYZ"})
+        self.assertLessEqual(events[0]["ts"], events[1]["ts"])
+
+    def test_recorded_call_returns_original_result(self):
+        self.recorder.attach(self.store_manager)
+        self.assertEqual(self.store_manager.apply_discount("P1", 50), 5.0)
+
+    def test_recorded_trace_contains_no_pii(self):
+        self.recorder.attach(self.store_manager)
+        self.store_manager.process_digital_order("D1", "4111-1111", self.customer_info)
+
+        trace = self.output.getvalue()
+        self.assertNotIn("4111-1111", trace)
+        self.assertNotIn("test@example.com", trace)
+
+    def test_detach_restores_original_methods(self):
+        self.recorder.attach(self.store_manager)
+        self.recorder.detach()
+        self.store_manager.apply_discount("P1", 10)
+        self.assertEqual(self.output.getvalue(), "")
+
+    def test_stacked_recorders_detach_in_any_order(self):
+        other_output = io.StringIO()
+        other = TrafficRecorder(other_output, salt="test")
+        self.recorder.attach(self.store_manager)
+        other.attach(self.store_manager)
+
+        self.recorder.detach()
+        self.store_manager.apply_discount("P1", 10)
+        self.assertEqual(self.output.getvalue(), "")
+        self.assertEqual(len(other_output.getvalue().splitlines()), 1)
+
+        other.detach()
+        self.assertNotIn("apply_discount", vars(self.store_manager))
+        self.assertEqual(self.store_manager.apply_discount("P1", 50), 5.0)
+
+    def test_attach_twice_raises_error(self):
+        self.recorder.attach(self.store_manager)
+        with self.assertRaises(RuntimeError):
+            self.recorder.attach(self.store_manager)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)